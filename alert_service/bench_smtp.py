@@ -0,0 +1,64 @@
+"""Email throughput benchmark against the local SMTP stand-in.
+
+Compares the old connect/login/send/quit-per-message path with the pooled
+connections used by NotificationService, at several pool sizes.
+
+    python alert_service/bench_smtp.py --messages 200 --connect-delay 0.05
+"""
+import argparse
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from smtp_pool import SMTPConnectionPool
+from smtp_stub import LocalSMTPServer
+
+MESSAGE = "Subject: Fraud Alert\r\n\r\nBenchmark message"
+
+
+def send_per_connection(port, count):
+    """Old NotificationService behaviour: one connection per message"""
+    for _ in range(count):
+        server = smtplib.SMTP('127.0.0.1', port)
+        server.login('bench', 'bench')
+        server.sendmail('alerts@finshield.com', ['admin@finshield.com'], MESSAGE)
+        server.quit()
+
+
+def send_pooled(port, count, pool_size):
+    """Pooled connections shared by a worker thread per connection"""
+    pool = SMTPConnectionPool('127.0.0.1', port, username='bench', password='bench',
+                              use_tls=False, max_size=pool_size)
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        list(executor.map(
+            lambda _: pool.send('alerts@finshield.com', ['admin@finshield.com'], MESSAGE),
+            range(count)
+        ))
+    pool.close()
+    return pool.get_stats()
+
+
+def main(args):
+    with LocalSMTPServer(connect_delay=args.connect_delay, message_delay=args.message_delay) as smtp:
+        print(f"{'mode':<28} {'msgs/s':>10} {'connections':>12}")
+
+        start = time.perf_counter()
+        send_per_connection(smtp.port, args.messages)
+        print(f"{'connection per message':<28} {args.messages / (time.perf_counter() - start):>10.1f} "
+              f"{args.messages:>12}")
+
+        for pool_size in [int(size) for size in args.pool_sizes.split(',')]:
+            start = time.perf_counter()
+            stats = send_pooled(smtp.port, args.messages, pool_size)
+            print(f"{f'pool of {pool_size}':<28} {args.messages / (time.perf_counter() - start):>10.1f} "
+                  f"{stats['connections_opened']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--connect-delay', type=float, default=0.05,
+                        help="simulated TCP+TLS+AUTH cost per new connection, seconds")
+    parser.add_argument('--message-delay', type=float, default=0.002)
+    parser.add_argument('--pool-sizes', default='1,4,8')
+    main(parser.parse_args())
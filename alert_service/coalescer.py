@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+
+
+class AlertCoalescer:
+    """Windowed coalescing of alerts per user and card.
+
+    The first alert for a `user_id`/card pair opens a window of
+    `window_seconds`; every alert for the same pair that arrives before it
+    closes joins the group. When the window closes the whole group is handed
+    to `flush_callback(alerts)` once, so a burst on a compromised card turns
+    into one digest and one batched write. Groups and deadlines live in
+    Redis, so an alert accepted by `add` survives a restart.
+
+    A group being flushed is renamed to a processing list and only deleted
+    once `flush_callback` has returned. If the callback raises, the group
+    is re-queued for another window, so the callback must be safe to run
+    again for alerts it has partly handled; if the process dies mid-flush, the
+    processing list's lease runs out after `lease_seconds` and any instance
+    re-queues it.
+    """
+
+    DEADLINES_KEY = 'coalesce:deadlines'
+    PROCESSING_KEY = 'coalesce:processing'
+    STATS_KEY = 'coalesce:stats'
+
+    def __init__(self, redis_client, window_seconds, flush_callback, poll_interval=0.25, lease_seconds=60):
+        self.redis = redis_client
+        self.window_seconds = window_seconds
+        self.flush_callback = flush_callback
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._task = None
+
+    def group_key(self, transaction):
+        return f"{transaction.get('user_id', 'unknown')}|{transaction.get('card_number', 'unknown')}"
+
+    def _group_list(self, key):
+        return f"coalesce:group:{key}"
+
+    def _processing_list(self, key):
+        return f"coalesce:processing:{key}"
+
+    def add(self, transaction, prediction):
+        """Add an alert to its user/card group, opening a window if none is open"""
+        key = self.group_key(transaction)
+
+        pipe = self.redis.pipeline()
+        pipe.rpush(self._group_list(key), json.dumps({
+            'transaction': transaction,
+            'prediction': prediction,
+            'received_at': time.time()
+        }))
+        pipe.zadd(self.DEADLINES_KEY, {key: time.time() + self.window_seconds}, nx=True)
+        pipe.hincrby(self.STATS_KEY, 'alerts_received', 1)
+        pipe.execute()
+        return key
+
+    async def start(self):
+        if self._task is None:
+            self.recover()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        """Flush every group whose window has closed"""
+        while True:
+            try:
+                self.recover()
+                for key in self.redis.zrangebyscore(self.DEADLINES_KEY, 0, time.time()):
+                    # Only the instance that wins the ZREM flushes the group
+                    if self.redis.zrem(self.DEADLINES_KEY, key):
+                        await self._flush(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error flushing coalesced alerts: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _flush(self, key):
+        group, processing = self._group_list(key), self._processing_list(key)
+        if self.redis.exists(processing):
+            # A failed flush of this group that hasn't been re-queued yet; its alerts go first
+            self._requeue(key)
+        if not self.redis.exists(group):
+            return
+
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.PROCESSING_KEY, {key: time.time() + self.lease_seconds})
+        pipe.rename(group, processing)
+        pipe.lrange(processing, 0, -1)
+        raw_alerts = pipe.execute()[-1]
+
+        alerts = [json.loads(raw) for raw in raw_alerts]
+        try:
+            notifications_sent, notifications_unbatched = await self.flush_callback(alerts)
+        except Exception:
+            self._requeue(key)
+            raise
+
+        pipe = self.redis.pipeline()
+        pipe.delete(processing)
+        pipe.zrem(self.PROCESSING_KEY, key)
+        pipe.execute()
+        self.record_flush(len(alerts), notifications_sent, notifications_unbatched)
+
+    def _requeue(self, key):
+        """Put a processing list's alerts back at the front of its group and give it a new window"""
+        processing = self._processing_list(key)
+        raw_alerts = self.redis.lrange(processing, 0, -1)
+        pipe = self.redis.pipeline()
+        if raw_alerts:
+            pipe.lpush(self._group_list(key), *reversed(raw_alerts))
+            pipe.zadd(self.DEADLINES_KEY, {key: time.time() + self.window_seconds}, nx=True)
+            pipe.hincrby(self.STATS_KEY, 'groups_requeued', 1)
+        pipe.delete(processing)
+        pipe.zrem(self.PROCESSING_KEY, key)
+        pipe.execute()
+
+    def recover(self):
+        """Re-queue groups whose flush lease ran out, e.g. the instance flushing them died"""
+        for key in self.redis.zrangebyscore(self.PROCESSING_KEY, 0, time.time()):
+            # Only the instance that wins the ZREM re-queues the group
+            if self.redis.zrem(self.PROCESSING_KEY, key):
+                self._requeue(key)
+
+    def record_flush(self, alerts, notifications_sent, notifications_unbatched):
+        """Count outbound calls and writes saved by coalescing"""
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self.STATS_KEY, 'groups_flushed', 1)
+        pipe.hincrby(self.STATS_KEY, 'alerts_flushed', alerts)
+        pipe.hincrby(self.STATS_KEY, 'notifications_sent', notifications_sent)
+        pipe.hincrby(self.STATS_KEY, 'notifications_saved', notifications_unbatched - notifications_sent)
+        pipe.hincrby(self.STATS_KEY, 'mongo_writes_saved', alerts - 1)
+        pipe.execute()
+
+    def get_stats(self):
+        stats = {field: int(value) for field, value in self.redis.hgetall(self.STATS_KEY).items()}
+        stats['open_groups'] = self.redis.zcard(self.DEADLINES_KEY)
+        stats['flushing_groups'] = self.redis.zcard(self.PROCESSING_KEY)
+        stats['window_seconds'] = self.window_seconds
+        return stats
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """Token-bucket rate limiter for one notification channel"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Channel:
+    """Delivery settings for one notification channel"""
+
+    def __init__(self, name, sender, rate, burst, workers):
+        self.name = name
+        self.sender = sender
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"notify-{name}")
+        self.stats = {'sent': 0, 'failed': 0, 'retried': 0, 'dead': 0}
+
+
+class NotificationDispatcher:
+    """Channel-agnostic notification dispatcher backed by Redis.
+
+    Jobs are pushed to a per-channel Redis list and `enqueue` returns as soon
+    as that write succeeds. Each channel has its own worker coroutines,
+    sender thread pool and token bucket, so a slow provider only backs up its
+    own queue. A job being delivered sits in this instance's processing list
+    for the channel until it succeeds or is rescheduled. Every instance
+    heartbeats in `notifications:instances`; once an instance has missed
+    its heartbeat for `lease_seconds` (it died or was restarted), another
+    instance moves its processing lists back to pending, so jobs other live
+    instances are delivering are never sent twice. Failed sends go to a Redis sorted set scored by their next
+    attempt time (exponential backoff with jitter) and land in a dead-letter
+    list after `max_attempts`.
+    """
+
+    RETRY_KEY = 'notifications:retry'
+    DEAD_KEY = 'notifications:dead'
+    INSTANCES_KEY = 'notifications:instances'
+
+    def __init__(self, redis_client, max_attempts=5, base_delay=2.0, max_delay=300.0,
+                 poll_timeout=1, lease_seconds=30, on_result=None):
+        self.redis = redis_client
+        self.channels = {}
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_timeout = poll_timeout
+        self.lease_seconds = lease_seconds
+        self.on_result = on_result
+        self.instance_id = uuid.uuid4().hex
+        self._tasks = []
+        self._poll_executor = None
+
+    def add_channel(self, name, sender, rate, burst=1, workers=1):
+        """Register a channel; `sender(**payload)` is blocking and raises on failure"""
+        self.channels[name] = Channel(name, sender, rate, burst, workers)
+
+    def pending_key(self, channel):
+        return f"notifications:pending:{channel}"
+
+    def processing_key(self, channel, instance_id=None):
+        return f"notifications:processing:{channel}:{instance_id or self.instance_id}"
+
+    def enqueue(self, channel, payload, alert_ids=None, trace_ids=None):
+        """Durably queue a notification and return its job id"""
+        if channel not in self.channels:
+            raise ValueError(f"Unknown notification channel: {channel}")
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'channel': channel,
+            'payload': payload,
+            'alert_ids': alert_ids or [],
+            'trace_ids': trace_ids or [],
+            'attempts': 0,
+            'enqueued_at': time.time()
+        }
+        self.redis.lpush(self.pending_key(channel), json.dumps(job))
+        return job['id']
+
+    async def start(self):
+        """Recover jobs of dead instances and start the channel workers, heartbeat and retry pump"""
+        self.redis.zadd(self.INSTANCES_KEY, {self.instance_id: time.time()})
+        self.recover_expired()
+        # Shared processing lists left by versions without per-instance leases
+        for name in self.channels:
+            while self.redis.rpoplpush(f"notifications:processing:{name}", self.pending_key(name)):
+                pass
+
+        # Workers block in BRPOPLPUSH on these threads rather than polling on the event loop
+        self._poll_executor = ThreadPoolExecutor(
+            max_workers=sum(channel.workers for channel in self.channels.values()),
+            thread_name_prefix='notify-poll'
+        )
+        for channel in self.channels.values():
+            for _ in range(channel.workers):
+                self._tasks.append(asyncio.create_task(self._worker(channel)))
+
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        self._tasks.append(asyncio.create_task(self._retry_pump()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._poll_executor:
+            self._poll_executor.shutdown(wait=False)
+            self._poll_executor = None
+
+    def _requeue_instance(self, instance_id):
+        for name in self.channels:
+            while self.redis.rpoplpush(self.processing_key(name, instance_id), self.pending_key(name)):
+                pass
+
+    def recover_expired(self):
+        """Move the in-flight jobs of instances whose heartbeat lease ran out back to pending"""
+        expired = self.redis.zrangebyscore(self.INSTANCES_KEY, 0, time.time() - self.lease_seconds)
+        for instance_id in expired:
+            # Only the instance that wins the ZREM requeues the jobs
+            if instance_id != self.instance_id and self.redis.zrem(self.INSTANCES_KEY, instance_id):
+                self._requeue_instance(instance_id)
+                print(f"Recovered notifications in flight on expired instance {instance_id}")
+
+    async def _heartbeat(self):
+        while True:
+            try:
+                self.redis.zadd(self.INSTANCES_KEY, {self.instance_id: time.time()})
+            except Exception as e:
+                print(f"Error in notification heartbeat: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _worker(self, channel):
+        """Deliver jobs from one channel's queue"""
+        loop = asyncio.get_running_loop()
+        pending, processing = self.pending_key(channel.name), self.processing_key(channel.name)
+
+        while True:
+            try:
+                raw = await loop.run_in_executor(
+                    self._poll_executor, self.redis.brpoplpush, pending, processing, self.poll_timeout
+                )
+                if raw is None:
+                    continue
+
+                job = json.loads(raw)
+                await channel.bucket.acquire()
+
+                try:
+                    await loop.run_in_executor(
+                        channel.executor, lambda: channel.sender(**job['payload'])
+                    )
+                except Exception as e:
+                    self._schedule_retry(channel, job, raw, e)
+                    continue
+
+                self.redis.lrem(processing, 1, raw)
+                channel.stats['sent'] += 1
+                self._report(job, True)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in {channel.name} notification worker: {e}")
+                await asyncio.sleep(1)
+
+    def _schedule_retry(self, channel, job, raw, error):
+        """Move a failed job to the retry set, or to the dead-letter list"""
+        channel.stats['failed'] += 1
+        job['attempts'] += 1
+        job['last_error'] = str(error)
+        print(f"{channel.name} notification failed (attempt {job['attempts']}): {error}")
+
+        pipe = self.redis.pipeline()
+        pipe.lrem(self.processing_key(channel.name), 1, raw)
+        if job['attempts'] >= self.max_attempts:
+            channel.stats['dead'] += 1
+            pipe.lpush(self.DEAD_KEY, json.dumps(job))
+        else:
+            channel.stats['retried'] += 1
+            delay = min(self.max_delay, self.base_delay * 2 ** (job['attempts'] - 1))
+            pipe.zadd(self.RETRY_KEY, {json.dumps(job): time.time() + delay * random.uniform(0.8, 1.2)})
+        pipe.execute()
+
+        if job['attempts'] >= self.max_attempts:
+            self._report(job, False)
+
+    async def _retry_pump(self):
+        """Move retries whose backoff has expired back onto their channel queue"""
+        while True:
+            try:
+                self.recover_expired()
+                for raw in self.redis.zrangebyscore(self.RETRY_KEY, 0, time.time(), start=0, num=100):
+                    # Only the instance that wins the ZREM requeues the job
+                    if self.redis.zrem(self.RETRY_KEY, raw):
+                        self.redis.lpush(self.pending_key(json.loads(raw)['channel']), raw)
+            except Exception as e:
+                print(f"Error in notification retry pump: {e}")
+            await asyncio.sleep(0.5)
+
+    def _report(self, job, delivered):
+        if self.on_result:
+            try:
+                self.on_result(job, delivered)
+            except Exception as e:
+                print(f"Error recording notification result: {e}")
+
+    def get_stats(self):
+        """Per-channel delivery counters and queue depths"""
+        return {
+            'channels': {
+                name: {
+                    **channel.stats,
+                    'pending': self.redis.llen(self.pending_key(name)),
+                    'in_flight': self.redis.llen(self.processing_key(name)),
+                    'rate_per_sec': channel.bucket.rate
+                }
+                for name, channel in self.channels.items()
+            },
+            'retry_scheduled': self.redis.zcard(self.RETRY_KEY),
+            'dead_letters': self.redis.llen(self.DEAD_KEY)
+        }
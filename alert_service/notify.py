@@ -1,17 +1,32 @@
 import asyncio
-import json
-import smtplib
+import hashlib
+import os
+import sys
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import redis
 from pymongo import MongoClient
-from fastapi import FastAPI, HTTPException
+from pymongo.errors import BulkWriteError
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import Optional
 import uvicorn
-import os
-from twilio.rest import Client
 import requests
+from smtp_pool import SMTPConnectionPool
+from dispatcher import NotificationDispatcher
+from coalescer import AlertCoalescer
+from bson import ObjectId
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tracing import stamp_stage, record_trace, record_stage
+from common.blocklist import Blocklist, BLOCKLIST_FIELDS
+from common.storage import ensure_indexes, find_shape, with_stored_at
+from common.live_feed import LiveFeed, publish_event
+from common.stats import record_alert
+from common.codec import DocumentCache
+from common.warmup import Readiness
 
 # Initialize services
 app = FastAPI(title="FinShield Alert Service")
@@ -28,120 +43,145 @@ SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
 SMTP_USERNAME = os.getenv('SMTP_USERNAME', 'demo@example.com')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', 'demo_password')
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '4'))
+SMTP_KEEPALIVE_SECONDS = int(os.getenv('SMTP_KEEPALIVE_SECONDS', '30'))
+
+# Per-channel send rates (messages/second) and retry policy
+SMS_RATE_PER_SEC = float(os.getenv('SMS_RATE_PER_SEC', '1'))
+EMAIL_RATE_PER_SEC = float(os.getenv('EMAIL_RATE_PER_SEC', '10'))
+VOICE_RATE_PER_SEC = float(os.getenv('VOICE_RATE_PER_SEC', '0.2'))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+
+# Alerts for the same user and card within this window share one digest notification
+ALERT_COALESCE_WINDOW_SECONDS = float(os.getenv('ALERT_COALESCE_WINDOW_SECONDS', '30'))
+
+DUPLICATE_KEY = 11000
 
 class AlertRequest(BaseModel):
     transaction: dict
     prediction: dict
 
+class BlocklistEntry(BaseModel):
+    kind: str
+    value: str
+    reason: str = 'Manual block'
+
+blocklist = Blocklist(redis_client)
+live_feed = LiveFeed(redis_client, ['alerts', 'blocked'])
+document_cache = DocumentCache(redis_client)
+
 class NotificationService:
     def __init__(self):
         self.twilio_client = None
         self.email_enabled = False
-        
-        # Initialize Twilio
+        # Providers are connected by the background warm-up; until each has been
+        # checked its sends fail and the dispatcher retries them
+        self.twilio_checked = False
+        self.email_checked = False
+        self.smtp_pool = SMTPConnectionPool(
+            SMTP_SERVER, SMTP_PORT,
+            username=SMTP_USERNAME,
+            password=SMTP_PASSWORD,
+            use_tls=SMTP_USE_TLS,
+            max_size=SMTP_POOL_SIZE,
+            keepalive=SMTP_KEEPALIVE_SECONDS
+        )
+    
+    def connect_twilio(self):
+        """Initialize Twilio (the SDK is only imported here)"""
         try:
+            from twilio.rest import Client
             self.twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
             print("Twilio client initialized")
-        except:
+        except Exception:
             print("Twilio not configured, SMS disabled")
-        
-        # Test email configuration
+        self.twilio_checked = True
+    
+    def connect_email(self):
+        """Test email configuration"""
         try:
             self._test_email_config()
             self.email_enabled = True
             print("Email service enabled")
-        except:
+        except Exception:
             print("Email not configured, email alerts disabled")
+        self.email_checked = True
     
     def _test_email_config(self):
-        """Test email configuration"""
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        server.quit()
+        """Test email configuration (the connection stays in the pool)"""
+        with self.smtp_pool.connection():
+            pass
+    
+    # Senders are blocking and raise on failure; the dispatcher runs them on
+    # per-channel worker threads and retries failures
     
-    async def send_sms_alert(self, phone_number, message):
+    def send_sms_alert(self, phone_number, message):
         """Send SMS alert"""
-        try:
-            if not self.twilio_client:
-                print(f"SMS Alert (Mock): {phone_number} - {message}")
-                return True
-            
-            message = self.twilio_client.messages.create(
-                body=message,
-                from_=TWILIO_PHONE_NUMBER,
-                to=phone_number
-            )
-            
-            print(f"SMS sent: {message.sid}")
-            return True
-            
-        except Exception as e:
-            print(f"Error sending SMS: {e}")
-            return False
+        if not self.twilio_checked:
+            raise RuntimeError("SMS provider is still connecting")
+        if not self.twilio_client:
+            print(f"SMS Alert (Mock): {phone_number} - {message}")
+            return
+        
+        message = self.twilio_client.messages.create(
+            body=message,
+            from_=TWILIO_PHONE_NUMBER,
+            to=phone_number
+        )
+        
+        print(f"SMS sent: {message.sid}")
     
-    async def send_email_alert(self, email_address, subject, body):
+    def send_email_alert(self, email_address, subject, body):
         """Send email alert"""
-        try:
-            if not self.email_enabled:
-                print(f"Email Alert (Mock): {email_address} - {subject}")
-                return True
-            
-            msg = MIMEMultipart()
-            msg['From'] = SMTP_USERNAME
-            msg['To'] = email_address
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(body, 'html'))
-            
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            text = msg.as_string()
-            server.sendmail(SMTP_USERNAME, email_address, text)
-            server.quit()
-            
-            print(f"Email sent to {email_address}")
-            return True
-            
-        except Exception as e:
-            print(f"Error sending email: {e}")
-            return False
+        if not self.email_checked:
+            raise RuntimeError("Email provider is still connecting")
+        if not self.email_enabled:
+            print(f"Email Alert (Mock): {email_address} - {subject}")
+            return
+        
+        msg = MIMEMultipart()
+        msg['From'] = SMTP_USERNAME
+        msg['To'] = email_address
+        msg['Subject'] = subject
+        
+        msg.attach(MIMEText(body, 'html'))
+        
+        self.smtp_pool.send(SMTP_USERNAME, [email_address], msg.as_string())
+        
+        print(f"Email sent to {email_address}")
     
-    async def make_voice_call(self, phone_number, message):
+    def make_voice_call(self, phone_number, message):
         """Make voice call alert"""
-        try:
-            if not self.twilio_client:
-                print(f"Voice Call (Mock): {phone_number} - {message}")
-                return True
-            
-            # Create TwiML for voice message
-            twiml = f"""
-            <Response>
-                <Say voice="alice">
-                    Fraud Alert from FinShield Link. 
-                    Suspicious transaction detected. 
-                    Amount: {message}
-                    Please review immediately.
-                </Say>
-            </Response>
-            """
-            
-            call = self.twilio_client.calls.create(
-                twiml=twiml,
-                to=phone_number,
-                from_=TWILIO_PHONE_NUMBER
-            )
-            
-            print(f"Voice call initiated: {call.sid}")
-            return True
-            
-        except Exception as e:
-            print(f"Error making voice call: {e}")
-            return False
+        if not self.twilio_checked:
+            raise RuntimeError("Voice provider is still connecting")
+        if not self.twilio_client:
+            print(f"Voice Call (Mock): {phone_number} - {message}")
+            return
+        
+        # Create TwiML for voice message
+        twiml = f"""
+        <Response>
+            <Say voice="alice">
+                Fraud Alert from FinShield Link. 
+                Suspicious transaction detected. 
+                Amount: {message}
+                Please review immediately.
+            </Say>
+        </Response>
+        """
+        
+        call = self.twilio_client.calls.create(
+            twiml=twiml,
+            to=phone_number,
+            from_=TWILIO_PHONE_NUMBER
+        )
+        
+        print(f"Voice call initiated: {call.sid}")
     
-    async def block_transaction(self, transaction_id):
-        """Block transaction (simulate)"""
+    async def block_transaction(self, transaction):
+        """Block transaction (simulate) and blocklist its card and user at ingestion"""
+        transaction_id = transaction.get('_id', 'unknown')
         try:
             # In real implementation, this would interface with payment processor
             block_info = {
@@ -152,10 +192,14 @@ class NotificationService:
             }
             
             # Store in Redis
-            redis_client.setex(f"blocked:{transaction_id}", 3600, json.dumps(block_info))
+            document_cache.set('blocked', transaction_id, block_info)
             
             # Store in MongoDB
-            db.blocked_transactions.insert_one(block_info)
+            db.blocked_transactions.insert_one(with_stored_at(block_info))
+            publish_event(redis_client, 'blocked', block_info)
+            
+            # Further transactions from this user, and card if it isn't masked, are stopped before scoring
+            blocklist.add_transaction(transaction, kinds=('card', 'user'), reason=f"Blocked transaction {transaction_id}")
             
             print(f"Transaction blocked: {transaction_id}")
             return True
@@ -167,6 +211,219 @@ class NotificationService:
 # Initialize notification service
 notification_service = NotificationService()
 
+def record_notification_result(job, delivered):
+    """Record the final outcome of a notification on the alerts it covered"""
+    if job.get('alert_ids'):
+        db.alerts.update_many(
+            {'_id': {'$in': [ObjectId(alert_id) for alert_id in job['alert_ids']]}},
+            {'$set': {f"notifications_sent.{job['channel']}": delivered}}
+        )
+    if delivered:
+        record_stage(redis_client, job.get('trace_ids'), 'notified')
+
+dispatcher = NotificationDispatcher(
+    redis_client, max_attempts=NOTIFY_MAX_ATTEMPTS, on_result=record_notification_result
+)
+dispatcher.add_channel('sms', notification_service.send_sms_alert, rate=SMS_RATE_PER_SEC, burst=5, workers=2)
+dispatcher.add_channel('email', notification_service.send_email_alert,
+                       rate=EMAIL_RATE_PER_SEC, burst=20, workers=SMTP_POOL_SIZE)
+dispatcher.add_channel('voice', notification_service.make_voice_call, rate=VOICE_RATE_PER_SEC, burst=1, workers=1)
+
+def alert_notifications(transaction, prediction):
+    """Notification payloads per channel for a single alert"""
+    transaction_id = transaction.get('_id', 'unknown')
+    amount = transaction.get('amount', 0)
+    merchant = transaction.get('merchant', 'Unknown')
+    risk_score = prediction.get('confidence', 0)
+    
+    # Prepare alert messages
+    sms_message = f"FRAUD ALERT: ${amount} at {merchant}. Risk: {risk_score:.2%}. Transaction ID: {transaction_id}"
+    
+    email_subject = f"Fraud Alert - Transaction {transaction_id}"
+    email_body = f"""
+    <html>
+    <body>
+        <h2>🚨 Fraud Alert - FinShield Link</h2>
+        <p><strong>Transaction Details:</strong></p>
+        <ul>
+            <li>Amount: ${amount}</li>
+            <li>Merchant: {merchant}</li>
+            <li>Location: {transaction.get('location', 'Unknown')}</li>
+            <li>User ID: {transaction.get('user_id', 'Unknown')}</li>
+            <li>Risk Score: {risk_score:.2%}</li>
+            <li>Prediction: {prediction.get('prediction', 'Unknown')}</li>
+        </ul>
+        <p><strong>Action Taken:</strong> {'Transaction BLOCKED' if prediction.get('should_block') else 'Transaction FLAGGED'}</p>
+        <p><strong>Timestamp:</strong> {datetime.now().isoformat()}</p>
+    </body>
+    </html>
+    """
+    
+    # Demo phone/email
+    notifications = {
+        'sms': {'phone_number': "+1234567890", 'message': sms_message},
+        'email': {'email_address': "admin@finshield.com", 'subject': email_subject, 'body': email_body}
+    }
+    
+    # Voice call for high-risk transactions
+    if risk_score > 0.8:
+        notifications['voice'] = {'phone_number': "+1234567890", 'message': f"${amount} at {merchant}"}
+    
+    return notifications
+
+def digest_notifications(alerts):
+    """One set of notification payloads summarising a coalesced group of alerts"""
+    transactions = [alert['transaction'] for alert in alerts]
+    predictions = [alert['prediction'] for alert in alerts]
+    total = sum(tx.get('amount', 0) for tx in transactions)
+    max_risk = max(p.get('confidence', 0) for p in predictions)
+    blocked = sum(1 for p in predictions if p.get('should_block'))
+    merchants = ', '.join(sorted({tx.get('merchant', 'Unknown') for tx in transactions}))
+    user_id = transactions[0].get('user_id', 'Unknown')
+    card_number = transactions[0].get('card_number', 'Unknown')
+    
+    sms_message = f"FRAUD ALERT: {len(alerts)} transactions totalling ${total:.2f} on card {card_number} " \
+                  f"({merchants}). Max risk: {max_risk:.2%}. {blocked} blocked."
+    
+    rows = ''.join(
+        f"<tr><td>{tx.get('_id', 'unknown')}</td><td>${tx.get('amount', 0)}</td>"
+        f"<td>{tx.get('merchant', 'Unknown')}</td><td>{tx.get('location', 'Unknown')}</td>"
+        f"<td>{p.get('confidence', 0):.2%}</td><td>{'BLOCKED' if p.get('should_block') else 'FLAGGED'}</td></tr>"
+        for tx, p in zip(transactions, predictions)
+    )
+    email_subject = f"Fraud Alert - {len(alerts)} transactions for {user_id}"
+    email_body = f"""
+    <html>
+    <body>
+        <h2>🚨 Fraud Alert Digest - FinShield Link</h2>
+        <p><strong>User ID:</strong> {user_id} &nbsp; <strong>Card:</strong> {card_number}</p>
+        <p><strong>Total:</strong> ${total:.2f} across {len(alerts)} transactions</p>
+        <table>
+            <tr><th>Transaction</th><th>Amount</th><th>Merchant</th><th>Location</th><th>Risk</th><th>Action</th></tr>
+            {rows}
+        </table>
+        <p><strong>Timestamp:</strong> {datetime.now().isoformat()}</p>
+    </body>
+    </html>
+    """
+    
+    notifications = {
+        'sms': {'phone_number': "+1234567890", 'message': sms_message},
+        'email': {'email_address': "admin@finshield.com", 'subject': email_subject, 'body': email_body}
+    }
+    
+    if max_risk > 0.8:
+        notifications['voice'] = {
+            'phone_number': "+1234567890",
+            'message': f"{len(alerts)} transactions totalling ${total:.2f}"
+        }
+    
+    return notifications
+
+# Channels already queued for an alert, so a flush retried after a failure never sends them twice
+ENQUEUED_KEY_PREFIX = 'alerts:enqueued:'
+ENQUEUED_TTL_SECONDS = 86400
+
+def alert_object_id(alert):
+    """Deterministic `_id` for an alert record: its arrival time, then a hash of its group, transaction and arrival"""
+    transaction = alert['transaction']
+    identity = f"{coalescer.group_key(transaction)}|{transaction.get('_id', 'unknown')}|{alert['received_at']!r}"
+    return ObjectId(int(alert['received_at']).to_bytes(4, 'big') + hashlib.sha1(identity.encode()).digest()[:8])
+
+def notifications_for(alerts):
+    if len(alerts) == 1:
+        return alert_notifications(alerts[0]['transaction'], alerts[0]['prediction'])
+    return digest_notifications(alerts)
+
+async def flush_alert_group(alerts):
+    """Store a coalesced group's alerts in one write and queue one set of notifications.
+
+    Safe to run again for the same alerts: records have deterministic ids and
+    existing ones are skipped, and a channel already queued for an alert is
+    not queued again, so a group re-queued after a failed flush only sends
+    what is still missing.
+    """
+    unbatched = sum(len(alert_notifications(a['transaction'], a['prediction'])) for a in alerts)
+    notifications = notifications_for(alerts)
+    alert_ids = [alert_object_id(alert) for alert in alerts]
+    
+    # Store alerts in database; channel outcomes are filled in as deliveries finish
+    alert_records = [
+        {
+            '_id': alert_id,
+            'transaction_id': alert['transaction'].get('_id', 'unknown'),
+            'transaction': alert['transaction'],
+            'prediction': alert['prediction'],
+            'notifications_sent': {
+                channel: 'queued' if channel in notifications else False
+                for channel in ('sms', 'email', 'voice')
+            },
+            'digest_size': len(alerts),
+            'created_at': datetime.now().isoformat()
+        }
+        for alert_id, alert in zip(alert_ids, alerts)
+    ]
+    try:
+        db.alerts.insert_many([with_stored_at(record) for record in alert_records], ordered=False)
+    except BulkWriteError as e:
+        # Records written by an earlier attempt at this flush
+        if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']):
+            raise
+    
+    pipe = redis_client.pipeline()
+    for alert_id in alert_ids:
+        pipe.smembers(f"{ENQUEUED_KEY_PREFIX}{alert_id}")
+    enqueued = pipe.execute()
+    
+    sent = 0
+    for channel in ('sms', 'email', 'voice'):
+        pending = [i for i, done in enumerate(enqueued) if channel not in done]
+        if not pending:
+            continue
+        subset = alerts if len(pending) == len(alerts) else [alerts[i] for i in pending]
+        payload = (notifications if subset is alerts else notifications_for(subset)).get(channel)
+        if payload is None:
+            continue
+        
+        trace_ids = [a['transaction']['trace_id'] for a in subset if a['transaction'].get('trace_id')]
+        dispatcher.enqueue(channel, payload, alert_ids=[str(alert_ids[i]) for i in pending], trace_ids=trace_ids)
+        sent += 1
+        
+        pipe = redis_client.pipeline()
+        for i in pending:
+            pipe.sadd(f"{ENQUEUED_KEY_PREFIX}{alert_ids[i]}", channel)
+            pipe.expire(f"{ENQUEUED_KEY_PREFIX}{alert_ids[i]}", ENQUEUED_TTL_SECONDS)
+        pipe.execute()
+    
+    return sent, unbatched
+
+coalescer = AlertCoalescer(redis_client, ALERT_COALESCE_WINDOW_SECONDS, flush_alert_group)
+
+def setup_storage():
+    """Check Mongo is reachable and create the alert and block indexes and retention TTLs"""
+    mongo_client.admin.command('ping')
+    ensure_indexes(db, ['alerts', 'blocked_transactions'])
+
+readiness = Readiness('alert-service')
+readiness.add('redis', redis_client.ping)
+readiness.add('mongo', setup_storage)
+readiness.add('twilio', notification_service.connect_twilio)
+readiness.add('smtp', notification_service.connect_email)
+
+async def start_background_workers():
+    """Start the notification channel workers, the coalescing flusher and the live feed once Redis is up"""
+    while not readiness.is_ready('redis'):
+        await asyncio.sleep(0.5)
+    await dispatcher.start()
+    await coalescer.start()
+    await live_feed.start()
+
+@app.on_event("startup")
+async def start_dispatcher():
+    """Warm up connections in the background; the workers start as soon as Redis answers"""
+    readiness.start()
+    asyncio.create_task(start_background_workers())
+
 @app.post("/alert")
 async def process_alert(alert_request: AlertRequest):
     """Process fraud alert"""
@@ -175,109 +432,173 @@ async def process_alert(alert_request: AlertRequest):
         prediction = alert_request.prediction
         
         transaction_id = transaction.get('_id', 'unknown')
-        amount = transaction.get('amount', 0)
-        merchant = transaction.get('merchant', 'Unknown')
-        risk_score = prediction.get('confidence', 0)
         
-        # Block transaction if high risk
+        # Block transaction if high risk; blocking is never delayed by coalescing
         if prediction.get('should_block', False):
-            await notification_service.block_transaction(transaction_id)
+            await notification_service.block_transaction(transaction)
         
-        # Prepare alert messages
-        sms_message = f"FRAUD ALERT: ${amount} at {merchant}. Risk: {risk_score:.2%}. Transaction ID: {transaction_id}"
+        # Notifications and the alert record go out when the user/card window closes
+        group = coalescer.add(transaction, prediction)
         
-        email_subject = f"Fraud Alert - Transaction {transaction_id}"
-        email_body = f"""
-        <html>
-        <body>
-            <h2>🚨 Fraud Alert - FinShield Link</h2>
-            <p><strong>Transaction Details:</strong></p>
-            <ul>
-                <li>Amount: ${amount}</li>
-                <li>Merchant: {merchant}</li>
-                <li>Location: {transaction.get('location', 'Unknown')}</li>
-                <li>User ID: {transaction.get('user_id', 'Unknown')}</li>
-                <li>Risk Score: {risk_score:.2%}</li>
-                <li>Prediction: {prediction.get('prediction', 'Unknown')}</li>
-            </ul>
-            <p><strong>Action Taken:</strong> {'Transaction BLOCKED' if prediction.get('should_block') else 'Transaction FLAGGED'}</p>
-            <p><strong>Timestamp:</strong> {datetime.now().isoformat()}</p>
-        </body>
-        </html>
-        """
-        
-        # Send notifications (using demo phone/email)
-        tasks = []
-        
-        # SMS Alert
-        tasks.append(notification_service.send_sms_alert("+1234567890", sms_message))
-        
-        # Email Alert
-        tasks.append(notification_service.send_email_alert("admin@finshield.com", email_subject, email_body))
-        
-        # Voice call for high-risk transactions
-        if risk_score > 0.8:
-            tasks.append(notification_service.make_voice_call("+1234567890", f"${amount} at {merchant}"))
-        
-        # Execute all notifications
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Store alert in database
-        alert_record = {
+        # Dashboards see the alert now; its stored record is written when the group flushes
+        channels = alert_notifications(transaction, prediction)
+        publish_event(redis_client, 'alerts', {
             'transaction_id': transaction_id,
             'transaction': transaction,
             'prediction': prediction,
             'notifications_sent': {
-                'sms': results[0] if len(results) > 0 else False,
-                'email': results[1] if len(results) > 1 else False,
-                'voice': results[2] if len(results) > 2 else False
+                channel: 'queued' if channel in channels else False
+                for channel in ('sms', 'email', 'voice')
             },
+            'coalesce_group': group,
             'created_at': datetime.now().isoformat()
-        }
+        })
         
-        db.alerts.insert_one(alert_record)
+        record_alert(redis_client, blocked=prediction.get('should_block', False))
+        stamp_stage(transaction, 'alert_received')
+        record_trace(redis_client, transaction)
         
         return {
             'status': 'success',
             'transaction_id': transaction_id,
             'blocked': prediction.get('should_block', False),
-            'notifications_sent': alert_record['notifications_sent'],
+            'notifications': 'coalesced',
+            'coalesce_group': group,
             'timestamp': datetime.now().isoformat()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/stream/alerts")
+async def stream_alerts(request: Request):
+    """Server-Sent Events feed of new alerts, replaying the most recent on connect"""
+    return live_feed.response('alerts', request)
+
+@app.get("/stream/blocked")
+async def stream_blocked(request: Request):
+    """Server-Sent Events feed of blocked transactions, replaying the most recent on connect"""
+    return live_feed.response('blocked', request)
+
+@app.get("/alerts/coalescing/stats")
+async def get_coalescing_stats():
+    """Alerts coalesced, digests sent and outbound calls saved"""
+    try:
+        return coalescer.get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/blocklist")
+async def add_blocklist_entry(entry: BlocklistEntry):
+    """Block a card, user, IP or device at ingestion"""
+    try:
+        added = blocklist.add(entry.kind, entry.value, entry.reason)
+        return {'status': 'added' if added else 'exists', 'kind': entry.kind, 'value': entry.value}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/blocklist/{kind}/{value}")
+async def remove_blocklist_entry(kind: str, value: str):
+    """Unblock a card, user, IP or device"""
+    try:
+        if not blocklist.remove(kind, value):
+            raise HTTPException(status_code=404, detail=f"{kind} {value} is not blocklisted")
+        return {'status': 'removed', 'kind': kind, 'value': value}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/blocklist")
+async def get_blocklist(limit: int = 100):
+    """Blocklisted values per kind"""
+    try:
+        return {
+            'counts': blocklist.counts(),
+            'entries': {kind: blocklist.entries(kind, limit) for kind in BLOCKLIST_FIELDS}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/notifications/stats")
+async def get_notification_stats():
+    """Per-channel delivery counters, queue depths and retry backlog"""
+    try:
+        return dispatcher.get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/alerts/recent")
-async def get_recent_alerts(limit: int = 50):
-    """Get recent alerts"""
+async def get_recent_alerts(limit: int = 50, risk_level: Optional[str] = None):
+    """Get recent alerts, optionally at one risk level"""
     try:
-        alerts = list(db.alerts.find().sort([("_id", -1)]).limit(limit))
+        if risk_level:
+            alerts = list(find_shape(db.alerts, 'alerts: recent alerts by risk level', limit, risk_level=risk_level))
+        else:
+            alerts = list(find_shape(db.alerts, 'alerts: recent alerts', limit))
         for alert in alerts:
             alert['_id'] = str(alert['_id'])
         return alerts
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/alerts/transaction/{transaction_id}")
+async def get_transaction_alerts(transaction_id: str):
+    """Alerts and block records for one transaction"""
+    try:
+        alerts = list(find_shape(db.alerts, 'alerts: alerts for a transaction', transaction_id=transaction_id))
+        blocks = list(find_shape(
+            db.blocked_transactions, 'alerts: blocks for a transaction', transaction_id=transaction_id
+        ))
+        for item in alerts + blocks:
+            item['_id'] = str(item['_id'])
+        return {'transaction_id': transaction_id, 'alerts': alerts, 'blocks': blocks}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/blocked/recent")
 async def get_blocked_transactions(limit: int = 50):
     """Get recently blocked transactions"""
     try:
-        blocked = list(db.blocked_transactions.find().sort([("_id", -1)]).limit(limit))
+        blocked = list(find_shape(db.blocked_transactions, 'alerts: recent blocks', limit))
         for item in blocked:
             item['_id'] = str(item['_id'])
         return blocked
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/livez")
+async def liveness_check():
+    """The process is up and its event loop is responding"""
+    return readiness.liveness()
+
+@app.get("/readyz")
+async def readiness_check():
+    """200 once Redis and Mongo are connected and the providers checked, 503 with per-component state until then"""
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "twilio_enabled": notification_service.twilio_client is not None,
         "email_enabled": notification_service.email_enabled,
+        "smtp_pool": notification_service.smtp_pool.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.on_event("shutdown")
+async def close_smtp_pool():
+    """Stop background workers and log out of pooled SMTP connections"""
+    await coalescer.stop()
+    await dispatcher.stop()
+    await live_feed.stop()
+    notification_service.smtp_pool.close()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8003)
@@ -0,0 +1,112 @@
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SMTPConnectionPool:
+    """Bounded pool of authenticated, kept-alive SMTP connections.
+
+    Connections are opened (connect, STARTTLS, login) on demand up to
+    `max_size` and returned to the pool after each send, so a burst of alerts
+    pays the handshake once per connection instead of once per message.
+    Connections idle for longer than `keepalive` seconds are probed with NOOP
+    before reuse and transparently replaced if the server has dropped them.
+    Methods are blocking and meant to be called from worker threads.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_size=4, keepalive=30, timeout=10):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.stats = {'connections_opened': 0, 'reconnects': 0, 'messages_sent': 0}
+
+    def _connect(self):
+        """Open and authenticate a new connection"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.stats['connections_opened'] += 1
+        return server
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self):
+        """Reuse an idle connection if it is still alive, otherwise open one"""
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - last_used < self.keepalive:
+                return server
+
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.stats['reconnects'] += 1
+            server.close()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection; broken connections are discarded, not returned"""
+        if not self._slots.acquire(timeout=timeout if timeout is not None else self.timeout):
+            raise TimeoutError("No SMTP connection available")
+
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+        except (smtplib.SMTPServerDisconnected, OSError):
+            if server is not None:
+                # Counted here, like a connection that fails its probe in _checkout, and nowhere else
+                self.stats['reconnects'] += 1
+                server.close()
+                server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put((server, time.monotonic()))
+            self._slots.release()
+
+    def send(self, from_addr, to_addrs, message, retries=1):
+        """Send one message, reconnecting if the pooled connection was dropped"""
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as server:
+                    server.sendmail(from_addr, to_addrs, message)
+                self.stats['messages_sent'] += 1
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                if attempt == retries:
+                    raise
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def get_stats(self):
+        return {**self.stats, 'idle_connections': self._idle.qsize(), 'max_size': self.max_size}
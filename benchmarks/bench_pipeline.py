@@ -0,0 +1,287 @@
+"""End-to-end pipeline throughput benchmark without the docker-compose stack.
+
+Runs the real ingestion, risk engine and alert service code in one process,
+each service on its own thread and event loop as it would be in its own
+process, against the in-process stand-ins in standins.py: in-memory Kafka,
+fakeredis, mongomock, an LLM endpoint and Twilio with fixed latencies, and
+the local SMTP server. Transactions from the ingestion service's
+TransactionEvent generator are posted to `process_transaction` at a fixed
+offered rate. The report gives the sustained rate of every stage after
+warm-up, the per-hop latency percentiles from the pipeline traces, and the
+depth of every queue over time, so it shows where a backlog builds up.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_pipeline.py --rate 50 --duration 60 --report pipeline_report.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for path in (ROOT, os.path.join(ROOT, 'ingestion'), os.path.join(ROOT, 'risk_engine'),
+             os.path.join(ROOT, 'alert_service'), os.path.dirname(os.path.abspath(__file__))):
+    sys.path.append(path)
+
+import requests
+from standins import HTTPRouter, InMemoryKafka, LLMStandIn, install
+
+ALERT_URL = "http://localhost:8003/alert"
+LLM_URL = "http://localhost:8004/predict"
+CHANNELS = ['sms', 'email', 'voice']
+
+
+class ServiceLoop:
+    """A service's event loop on its own thread"""
+
+    def __init__(self, name):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def call(self, coroutine, timeout=None):
+        return self.submit(coroutine).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+async def run_hooks(handlers):
+    for handler in handlers:
+        await handler()
+
+
+async def wait_for(task):
+    """Await a task that was created on the calling loop"""
+    await task
+
+
+async def drive_ingestion(ingest, rate, duration, counters):
+    """Post generated transactions at a fixed offered rate; runs back-to-back when ingestion falls behind"""
+    from fastapi import HTTPException
+
+    interval = 1 / rate
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < duration:
+        delay = sent * interval - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        transaction = ingest.transaction_generator.generate_realistic_transaction()
+        try:
+            await ingest.process_transaction(ingest.Transaction(**transaction))
+            counters['ingested'] += 1
+        except HTTPException as e:
+            counters['rejected' if e.status_code == 403 else 'ingest_errors'] += 1
+        sent += 1
+
+
+def train_model(ml_model, ingest, size):
+    """Fit the risk engine's model on generated transactions when no model file is available"""
+    transactions = [ingest.transaction_generator.generate_realistic_transaction() for _ in range(size)]
+    if not ml_model.train(transactions):
+        raise RuntimeError("Model training failed")
+
+
+def _rate(series, field, start):
+    first = next(s for s in series if s['t'] >= start)
+    last = series[-1]
+    return (last[field] - first[field]) / (last['t'] - first['t']) if last['t'] > first['t'] else 0.0
+
+
+def summarise_queues(series, warmup):
+    """Peak and final depth per queue, and its growth rate after warm-up"""
+    measured = [s for s in series if s['t'] >= warmup] or series
+    summary = {}
+    for queue in series[0]['queues']:
+        t = np.array([s['t'] for s in measured])
+        depth = np.array([s['queues'][queue] for s in measured])
+        growth = float(np.polyfit(t, depth, 1)[0]) if len(measured) > 1 and np.ptp(t) > 0 else 0.0
+        summary[queue] = {
+            'max': int(max(s['queues'][queue] for s in series)),
+            'final': int(depth[-1]),
+            'growth_per_second': round(growth, 3),
+            # A queue still growing at the end of the run is where throughput is capped
+            'backlog': bool(growth * np.ptp(t) > 10 and depth[-1] > 10)
+        }
+    return summary
+
+
+def main(args):
+    out = sys.stdout
+
+    from smtp_stub import LocalSMTPServer
+
+    smtp = LocalSMTPServer(message_delay=args.smtp_latency_ms / 1000)
+    smtp.start()
+    os.environ.update({
+        'SMTP_SERVER': '127.0.0.1',
+        'SMTP_PORT': str(smtp.port),
+        'SMTP_USE_TLS': 'false',
+        'ALERT_COALESCE_WINDOW_SECONDS': str(args.coalesce_window),
+        # Keep the risk engine from writing its anomaly detector snapshot into the working directory
+        'ANOMALY_SNAPSHOT_SECONDS': '0'
+    })
+
+    broker = InMemoryKafka()
+    router = HTTPRouter(requests)
+    install(broker, router, twilio_latency_ms=args.twilio_latency_ms)
+    router.route(LLM_URL, LLMStandIn(requests, args.llm_latency_ms))
+
+    quiet = contextlib.redirect_stdout(open(os.devnull, 'w')) if not args.service_logs else contextlib.nullcontext()
+    with quiet:
+        import ingest
+        import predict
+        import notify
+        from common.tracing import MAX_TRACES, compute_latency_stats
+
+        if args.model:
+            if not predict.ml_model.load_model(args.model):
+                raise RuntimeError(f"Could not load model from {args.model}")
+        elif not predict.ml_model.is_trained:
+            print(f"Training model on {args.train_size} generated transactions...", file=out)
+            train_model(predict.ml_model, ingest, args.train_size)
+
+        ingestion_loop = ServiceLoop('ingestion').start()
+        risk_loop = ServiceLoop('risk-engine').start()
+        alert_loop = ServiceLoop('alert-service').start()
+
+        def post_alert(body, timeout):
+            try:
+                return 200, alert_loop.call(notify.process_alert(notify.AlertRequest(**body)), timeout)
+            except notify.HTTPException as e:
+                return e.status_code, {'detail': e.detail}
+
+        router.route(ALERT_URL, post_alert)
+
+        alert_loop.call(run_hooks(notify.app.router.on_startup))
+        ingestion_loop.call(run_hooks(ingest.app.router.on_startup))
+        # The risk engine's startup hooks start its Kafka consumer
+        risk_loop.call(run_hooks(predict.app.router.on_startup))
+
+        counters = {'ingested': 0, 'rejected': 0, 'ingest_errors': 0}
+        print(f"Offering {args.rate} tx/s for {args.duration}s "
+              f"(warm-up {args.warmup}s, LLM {args.llm_latency_ms}ms, "
+              f"Twilio {args.twilio_latency_ms}ms, SMTP {args.smtp_latency_ms}ms)", file=out)
+
+        redis_client = notify.redis_client
+        dispatcher = notify.dispatcher
+        series = []
+        started = time.time()
+
+        def sample():
+            series.append({
+                't': time.time() - started,
+                'ingested': counters['ingested'],
+                'scored': broker.size('transactions') - broker.lag('transactions'),
+                'alerted': router.calls[ALERT_URL],
+                'notified': sum(channel.stats['sent'] for channel in dispatcher.channels.values()),
+                'queues': {
+                    'kafka:transactions': broker.lag('transactions'),
+                    'coalesce:open_groups': redis_client.zcard(notify.coalescer.DEADLINES_KEY),
+                    **{f"notify:{channel}": redis_client.llen(dispatcher.pending_key(channel)) for channel in CHANNELS},
+                    'notify:retry': redis_client.zcard(dispatcher.RETRY_KEY)
+                }
+            })
+
+        driver = ingestion_loop.submit(drive_ingestion(ingest, args.rate, args.duration, counters))
+        while not driver.done():
+            sample()
+            time.sleep(args.sample_interval)
+        driver.result()
+        sample()
+        ended = series[-1]['t']
+
+        # Let the risk engine work through what is already on the topic
+        drain_started = time.time()
+        while broker.lag('transactions') and time.time() - drain_started < args.drain_timeout:
+            time.sleep(args.sample_interval)
+        drained = broker.lag('transactions') == 0
+        broker.close()
+        risk_loop.call(wait_for(predict.stream_task), args.drain_timeout + 10)
+
+        latency = compute_latency_stats(redis_client, limit=MAX_TRACES)
+
+        ingestion_loop.call(run_hooks(ingest.app.router.on_shutdown))
+        risk_loop.call(run_hooks(predict.app.router.on_shutdown))
+        alert_loop.call(dispatcher.stop())
+        alert_loop.call(notify.coalescer.stop())
+        alert_loop.call(run_hooks(notify.app.router.on_shutdown))
+        for loop in (ingestion_loop, risk_loop, alert_loop):
+            loop.stop()
+        smtp.stop()
+
+    measured = [s for s in series if s['t'] <= ended]
+    report = {
+        'offered_rate': args.rate,
+        'duration_seconds': args.duration,
+        'warmup_seconds': args.warmup,
+        'sustained_per_second': {
+            stage: round(_rate(measured, stage, args.warmup), 2)
+            for stage in ('ingested', 'scored', 'alerted', 'notified')
+        },
+        'totals': {**counters, 'scored': series[-1]['scored'], 'alerted': series[-1]['alerted'],
+                   'notified': series[-1]['notified']},
+        'drained': drained,
+        'latency_ms': latency,
+        'queues': summarise_queues(measured, args.warmup),
+        'notification_channels': {name: channel.stats for name, channel in dispatcher.channels.items()},
+        'series': series
+    }
+
+    print(f"\n{'stage':<10} {'tx/s':>8}", file=out)
+    for stage, rate in report['sustained_per_second'].items():
+        print(f"{stage:<10} {rate:>8.1f}", file=out)
+
+    print(f"\n{'hop':<26} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}", file=out)
+    for hop, stats in [('end_to_end', latency['end_to_end_ms'])] + list(latency['hops_ms'].items()):
+        if stats.get('count'):
+            print(f"{hop:<26} {stats['p50']:>8.1f} {stats['p90']:>8.1f} {stats['p99']:>8.1f}", file=out)
+
+    print(f"\n{'queue':<22} {'max':>7} {'final':>7} {'growth/s':>9}", file=out)
+    for queue, stats in report['queues'].items():
+        flag = '  <- backlog' if stats['backlog'] else ''
+        print(f"{queue:<22} {stats['max']:>7} {stats['final']:>7} {stats['growth_per_second']:>9.2f}{flag}", file=out)
+    if not drained:
+        print(f"\nKafka topic not drained within {args.drain_timeout}s", file=out)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nReport written to {args.report}", file=out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rate', type=float, default=20, help="offered transactions per second")
+    parser.add_argument('--duration', type=float, default=30, help="seconds of offered load")
+    parser.add_argument('--warmup', type=float, default=5, help="seconds excluded from sustained rates")
+    parser.add_argument('--drain-timeout', type=float, default=30)
+    parser.add_argument('--sample-interval', type=float, default=0.5)
+    parser.add_argument('--model', help="risk engine model file; trained on generated data when omitted")
+    parser.add_argument('--train-size', type=int, default=2000)
+    parser.add_argument('--llm-latency-ms', type=float, default=50)
+    parser.add_argument('--twilio-latency-ms', type=float, default=100)
+    parser.add_argument('--smtp-latency-ms', type=float, default=20)
+    parser.add_argument('--coalesce-window', type=float, default=5, help="alert coalescing window, seconds")
+    parser.add_argument('--service-logs', action='store_true', help="keep the services' own output")
+    parser.add_argument('--report', help="write the full report, including the sampled series, as JSON")
+    main(parser.parse_args())
@@ -0,0 +1,127 @@
+"""Cold-start time per service: time to import (and so answer /livez) and time to ready.
+
+Each service is started in a fresh interpreter: its module is imported, its
+FastAPI startup hooks are run, and its `readiness` is polled until every
+required component has warmed up. Reported per service: import seconds,
+startup-hook seconds, seconds until /readyz would return 200, the warm-up
+time of each component, and which heavy frameworks were imported by the
+module import itself (ideally none). Infrastructure is replaced by the
+stand-ins in standins.py so this runs offline; `--real` uses whatever
+Kafka/Redis/Mongo are configured instead.
+
+    python benchmarks/bench_startup.py --timeout 120 --report startup_report.json
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVICES = {
+    'ingestion': ('ingestion', 'ingest'),
+    'risk_engine': ('risk_engine', 'predict'),
+    'alert_service': ('alert_service', 'notify'),
+    'llm': ('llm_training', 'train_llm')
+}
+
+HEAVY_MODULES = ['tensorflow', 'torch', 'transformers', 'sklearn', 'networkx', 'pandas', 'scipy',
+                 'boto3', 'twilio', 'kafka']
+
+
+def run_child(service, timeout, real):
+    """Start one service in this process and print its timings as JSON"""
+    directory, module_name = SERVICES[service]
+    sys.path[:0] = [ROOT, os.path.join(ROOT, directory), os.path.dirname(os.path.abspath(__file__))]
+    out = sys.stdout
+
+    if not real:
+        import requests
+        from standins import HTTPRouter, InMemoryKafka, install
+        install(InMemoryKafka(), HTTPRouter(requests))
+
+    before = set(sys.modules)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        imported = time.perf_counter()
+        loaded = {name.split('.')[0] for name in set(sys.modules) - before}
+
+        async def start():
+            for handler in module.app.router.on_startup:
+                await handler()
+            hooks_done = time.perf_counter()
+            while not module.readiness.is_ready() and time.perf_counter() - started < timeout:
+                await asyncio.sleep(0.01)
+            return hooks_done, time.perf_counter()
+
+        hooks_done, ready_at = asyncio.new_event_loop().run_until_complete(start())
+
+    status = module.readiness.status()
+    print(json.dumps({
+        'service': service,
+        'import_seconds': round(imported - started, 3),
+        'startup_hooks_seconds': round(hooks_done - imported, 3),
+        'ready_seconds': round(ready_at - started, 3) if status['ready'] else None,
+        'components': status['components'],
+        'heavy_modules_at_import': sorted(name for name in HEAVY_MODULES if name in loaded)
+    }), file=out)
+    out.flush()
+    # Warm-up threads and service tasks are left running; skip their teardown
+    os._exit(0)
+
+
+def main(args):
+    results = []
+    for service in args.services:
+        command = [sys.executable, os.path.abspath(__file__), '--child', service, '--timeout', str(args.timeout)]
+        if args.real:
+            command.append('--real')
+
+        started = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout + 60)
+        wall = time.perf_counter() - started
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+        if not lines:
+            print(f"{service}: failed to start\n{completed.stderr[-2000:]}")
+            continue
+
+        result = json.loads(lines[-1])
+        result['process_seconds'] = round(wall, 3)
+        results.append(result)
+
+    print(f"{'service':<14} {'import s':>9} {'ready s':>8}  heavy imports at import / slowest component")
+    for result in results:
+        ready = f"{result['ready_seconds']:.2f}" if result['ready_seconds'] is not None else 'timeout'
+        warmed = [(c['seconds'] or float('inf'), name) for name, c in result['components'].items()]
+        slowest = max(warmed)[1] if warmed else '-'
+        heavy = ', '.join(result['heavy_modules_at_import']) or 'none'
+        print(f"{result['service']:<14} {result['import_seconds']:>9.2f} {ready:>8}  {heavy} / {slowest}")
+        for name, component in result['components'].items():
+            if not component['ready']:
+                print(f"{'':<14} {name} not ready: {component['error']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--services', nargs='+', choices=list(SERVICES), default=list(SERVICES))
+    parser.add_argument('--timeout', type=float, default=60, help="seconds to wait for readiness per service")
+    parser.add_argument('--real', action='store_true', help="use the configured infrastructure, not stand-ins")
+    parser.add_argument('--report')
+    parser.add_argument('--child', choices=list(SERVICES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.timeout, args.real)
+    else:
+        main(args)
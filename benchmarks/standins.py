@@ -0,0 +1,200 @@
+"""In-process stand-ins for the infrastructure the services talk to.
+
+`install()` patches the client classes the services import (Kafka, Redis,
+Mongo, Twilio and `requests.post` for the LLM and alert endpoints) so the
+real service modules can be imported and driven in one process, offline.
+It must run before the service modules are imported, since they create
+their clients at import time. Redis is backed by one shared fakeredis
+server and Mongo by mongomock; email goes through the local SMTP server in
+alert_service/smtp_stub.py.
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict, namedtuple
+
+ConsumerRecord = namedtuple('ConsumerRecord', ['topic', 'partition', 'offset', 'value'])
+
+
+class InMemoryKafka:
+    """Single-partition topics held as lists of serialized messages"""
+
+    def __init__(self):
+        self.topics = defaultdict(list)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.positions = {}
+
+    def append(self, topic, data):
+        with self.condition:
+            self.topics[topic].append(data)
+            self.condition.notify_all()
+
+    def size(self, topic):
+        return len(self.topics[topic])
+
+    def lag(self, topic):
+        """Messages produced to a topic that no consumer has read yet"""
+        consumed = max((offset for (t, _), offset in self.positions.items() if t == topic), default=0)
+        return self.size(topic) - consumed
+
+    def close(self):
+        """Let consumers finish: iteration ends once they have read everything"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class InMemoryProducer:
+    def __init__(self, broker, value_serializer=None, **kwargs):
+        self.broker = broker
+        self.value_serializer = value_serializer or (lambda value: value)
+
+    def send(self, topic, value=None, key=None):
+        self.broker.append(topic, self.value_serializer(value))
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self, timeout=None):
+        pass
+
+
+class InMemoryConsumer:
+    """Blocking iterator over topics, like kafka-python's KafkaConsumer"""
+
+    def __init__(self, broker, *topics, value_deserializer=None, **kwargs):
+        self.broker = broker
+        self.topics = topics
+        self.value_deserializer = value_deserializer or (lambda value: value)
+        self.id = uuid.uuid4().hex
+
+    def __iter__(self):
+        broker = self.broker
+        while True:
+            with broker.condition:
+                ready = [
+                    topic for topic in self.topics
+                    if broker.positions.get((topic, self.id), 0) < broker.size(topic)
+                ]
+                if not ready:
+                    if broker.closed:
+                        return
+                    broker.condition.wait(0.1)
+                    continue
+                topic = ready[0]
+                offset = broker.positions.get((topic, self.id), 0)
+                data = broker.topics[topic][offset]
+                broker.positions[(topic, self.id)] = offset + 1
+            yield ConsumerRecord(topic, 0, offset, self.value_deserializer(data))
+
+    def highwater(self, partition):
+        return self.broker.size(partition.topic)
+
+    def close(self):
+        pass
+
+
+class StandInResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class HTTPRouter:
+    """`requests.post` replacement routing service URLs to in-process handlers.
+
+    Handlers are `handler(json) -> (status_code, body)` and run on the
+    caller's thread; unknown URLs raise ConnectionError like an unreachable
+    service would.
+    """
+
+    def __init__(self, requests_module):
+        self.requests = requests_module
+        self.routes = {}
+        self.calls = defaultdict(int)
+
+    def route(self, url, handler):
+        self.routes[url] = handler
+
+    def post(self, url, json=None, timeout=None, **kwargs):
+        handler = self.routes.get(url)
+        if handler is None:
+            raise self.requests.ConnectionError(f"No stand-in for {url}")
+        self.calls[url] += 1
+        status_code, body = handler(json, timeout)
+        return StandInResponse(status_code, body)
+
+
+class LLMStandIn:
+    """Remote LLM endpoint answering after a fixed latency; past the caller's timeout it times out"""
+
+    def __init__(self, requests_module, latency_ms=50.0):
+        self.requests = requests_module
+        self.latency = latency_ms / 1000
+
+    def __call__(self, transaction, timeout=None):
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise self.requests.Timeout("LLM stand-in exceeded the caller's budget")
+        time.sleep(self.latency)
+        fraud = min(0.95, float(transaction.get('amount', 0) or 0) / 10000)
+        return 200, {'risk_scores': {'normal': (1 - fraud) * 0.7, 'suspicious': (1 - fraud) * 0.3, 'fraudulent': fraud}}
+
+
+class TwilioStandIn:
+    """Twilio `Client` whose messages and calls take a fixed provider latency"""
+
+    created = defaultdict(int)
+    latency = 0.1
+
+    def __init__(self, *args, **kwargs):
+        self.messages = self._Resource('sms')
+        self.calls = self._Resource('voice')
+
+    class _Resource:
+        def __init__(self, kind):
+            self.kind = kind
+
+        def create(self, **kwargs):
+            time.sleep(TwilioStandIn.latency)
+            TwilioStandIn.created[self.kind] += 1
+            return namedtuple('Resource', ['sid'])(uuid.uuid4().hex)
+
+
+def install(broker, router, twilio_latency_ms=100.0):
+    """Patch the client classes the services import; returns the shared fakeredis server"""
+    import fakeredis
+    import kafka
+    import mongomock
+    import pymongo
+    import redis
+    import redis.asyncio
+    import requests
+    import twilio.rest
+
+    server = fakeredis.FakeServer()
+
+    def sync_redis(*args, decode_responses=False, **kwargs):
+        return fakeredis.FakeRedis(server=server, decode_responses=decode_responses)
+
+    def async_redis(*args, decode_responses=False, **kwargs):
+        return fakeredis.aioredis.FakeRedis(server=server, decode_responses=decode_responses)
+
+    redis.Redis = sync_redis
+    redis.asyncio.Redis = async_redis
+
+    mongo = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: mongo
+
+    kafka.KafkaProducer = lambda *args, **kwargs: InMemoryProducer(broker, **kwargs)
+    kafka.KafkaConsumer = lambda *topics, **kwargs: InMemoryConsumer(broker, *topics, **kwargs)
+
+    TwilioStandIn.latency = twilio_latency_ms / 1000
+    twilio.rest.Client = TwilioStandIn
+
+    requests.post = router.post
+    return server
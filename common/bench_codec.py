@@ -0,0 +1,159 @@
+"""Redis memory per cached key: plain JSON versus the DocumentCache codec.
+
+Encodes synthetic transactions, predictions (with the full per-model
+components) and blocks both ways and reports value bytes per key. With
+`--redis-url` it also writes both variants to that server and reports
+`MEMORY USAGE` per key, which includes Redis' own key and object overhead.
+
+    python common/bench_codec.py --keys 2000 --redis-url redis://localhost:6379/15
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import redis
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.codec import SCHEMAS, DocumentCache, decode, encode
+
+
+def _scores():
+    values = [random.random() for _ in range(3)]
+    total = sum(values)
+    return dict(zip(['normal', 'suspicious', 'fraudulent'], (v / total for v in values)))
+
+
+def sample_transaction(i):
+    started = time.time()
+    return {
+        'event_id': i,
+        'card_number': f"****-****-****-{random.randint(1000, 9999)}",
+        'amount': round(random.uniform(5, 10000), 2),
+        'merchant': random.choice(['Amazon', 'Starbucks', 'Online Casino', 'Cash Withdrawal']),
+        'location': random.choice(['New York', 'Chicago', 'Las Vegas', 'Romania']),
+        'timestamp': '2024-05-01T12:00:00.000000',
+        'user_id': f"user_{random.randint(1000, 9999)}",
+        'ip_address': '.'.join(str(random.randint(1, 255)) for _ in range(4)),
+        'device_info': random.choice(['iPhone 14', 'Samsung Galaxy', 'Chrome Browser']),
+        'risk_profile': random.choice(['normal', 'suspicious', 'fraudulent']),
+        'trace_id': uuid.uuid4().hex,
+        'trace': {'ingested': started, 'produced': started + 0.002},
+        '_id': uuid.uuid4().hex[:24]
+    }
+
+
+def sample_prediction(transaction):
+    """Shaped like predict_fraud's result, including the ml_model output it embeds"""
+    scores = _scores()
+    ml_scores = _scores()
+    return {
+        'transaction_id': transaction['_id'],
+        'trace_id': transaction['trace_id'],
+        'risk_scores': scores,
+        'prediction': max(scores, key=scores.get),
+        'confidence': max(scores.values()),
+        'risk_level': random.choice(['LOW', 'MEDIUM', 'HIGH']),
+        'should_block': scores['fraudulent'] > 0.7,
+        'components': {
+            'ml_model': {
+                'risk_scores': ml_scores,
+                'prediction': max(ml_scores, key=ml_scores.get),
+                'confidence': max(ml_scores.values()),
+                'anomaly_detected': random.random() < 0.1,
+                'graph_risk': random.random(),
+                'ring': {'cluster_users': random.randint(1, 6), 'cluster_transactions': random.randint(1, 40),
+                         'cluster_fraud_rate': random.random()},
+                'model_components': {
+                    'random_forest': list(_scores().values()),
+                    'mlp': list(_scores().values()),
+                    'lstm': list(_scores().values()),
+                    'isolation_forest': random.choice([1, -1])
+                }
+            },
+            'aws_detector': {'fraud_probability': random.random(), 'risk_level': 'MEDIUM'},
+            'llm_model': _scores(),
+            'llm_source': 'distilled'
+        },
+        'timestamp': '2024-05-01T12:00:00.004000'
+    }
+
+
+def sample_block(transaction):
+    return {
+        'transaction_id': transaction['_id'],
+        'blocked_at': '2024-05-01T12:00:00.010000',
+        'reason': 'Fraud detection',
+        'status': 'BLOCKED'
+    }
+
+
+def encoded_sizes(kind, documents):
+    """Average JSON bytes, codec hot bytes and codec detail bytes per document"""
+    schema = SCHEMAS[kind]
+    json_bytes = hot_bytes = detail_bytes = 0
+    for document in documents:
+        json_bytes += len(json.dumps(document))
+        hot = {field: value for field, value in document.items() if field not in schema['detail']}
+        detail = {field: document[field] for field in schema['detail'] if field in document}
+        packed = encode(kind, hot)
+        assert decode(packed) == hot
+        hot_bytes += len(packed)
+        if detail:
+            detail_bytes += len(encode(kind, detail, schema['detail']))
+    count = len(documents)
+    return json_bytes / count, hot_bytes / count, detail_bytes / count
+
+
+def redis_memory(client, cache, kind, documents):
+    """Average MEMORY USAGE per document for JSON keys and for codec keys"""
+    json_total = codec_total = 0
+    for i, document in enumerate(documents):
+        json_key = f"bench:json:{kind}:{i}"
+        client.setex(json_key, 600, json.dumps(document))
+        json_total += client.memory_usage(json_key) or 0
+
+        doc_id = f"bench{i}"
+        cache.set(kind, doc_id, document, ttl=600)
+        for key in (cache.key(kind, doc_id), cache.detail_key(kind, doc_id)):
+            codec_total += client.memory_usage(key) or 0
+
+    client.delete(*[f"bench:json:{kind}:{i}" for i in range(len(documents))])
+    client.delete(*[cache.key(kind, f"bench{i}") for i in range(len(documents))])
+    client.delete(*[cache.detail_key(kind, f"bench{i}") for i in range(len(documents))])
+    return json_total / len(documents), codec_total / len(documents)
+
+
+def main(args):
+    random.seed(7)
+    transactions = [sample_transaction(i) for i in range(args.keys)]
+    samples = {
+        'transaction': transactions,
+        'prediction': [sample_prediction(tx) for tx in transactions],
+        'blocked': [sample_block(tx) for tx in transactions]
+    }
+
+    print(f"{'kind':<12} {'json B':>8} {'hot B':>8} {'detail B':>9} {'hot saving':>11}")
+    for kind, documents in samples.items():
+        json_bytes, hot_bytes, detail_bytes = encoded_sizes(kind, documents)
+        print(f"{kind:<12} {json_bytes:>8.0f} {hot_bytes:>8.0f} {detail_bytes:>9.0f} "
+              f"{1 - hot_bytes / json_bytes:>10.0%}")
+
+    if args.redis_url:
+        client = redis.Redis.from_url(args.redis_url)
+        cache = DocumentCache(client)
+        print(f"\nMEMORY USAGE per document on {args.redis_url} (codec = hot + detail keys)")
+        print(f"{'kind':<12} {'json B':>8} {'codec B':>8} {'saving':>8}")
+        for kind, documents in samples.items():
+            json_memory, codec_memory = redis_memory(client, cache, kind, documents)
+            print(f"{kind:<12} {json_memory:>8.0f} {codec_memory:>8.0f} {1 - codec_memory / json_memory:>7.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=2000)
+    parser.add_argument('--redis-url', help="also measure MEMORY USAGE on this Redis (use a scratch db)")
+    main(parser.parse_args())
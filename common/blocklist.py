@@ -0,0 +1,249 @@
+import hashlib
+import json
+import math
+import threading
+import time
+
+# Blocklist kinds and the transaction field each one is matched against
+BLOCKLIST_FIELDS = {
+    'card': 'card_number',
+    'user': 'user_id',
+    'ip': 'ip_address',
+    'device': 'device_info'
+}
+
+UPDATES_CHANNEL = 'blocklist:updates'
+
+
+def is_masked_card(value):
+    """Masked numbers like ****-****-****-1234 are shared by every card with the same last digits"""
+    return '*' in str(value)
+
+
+def _members_key(kind):
+    return f"blocklist:{kind}"
+
+
+def _reasons_key(kind):
+    return f"blocklist:reasons:{kind}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        # Most lookups are misses and stop at the first clear bit
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class Blocklist:
+    """Redis-backed blocklist of cards, users, IPs and devices.
+
+    The alert service owns the entries: each kind is a Redis set with a
+    reason hash alongside it, and every change is published on
+    `blocklist:updates` so edge readers can update without polling.
+    A `card` entry must be a full card number or a token; masked numbers
+    are refused, as they would block every card ending in the same digits.
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def _check_kind(self, kind):
+        if kind not in BLOCKLIST_FIELDS:
+            raise ValueError(f"Unknown blocklist kind: {kind}")
+
+    def add(self, kind, value, reason='Fraud detection'):
+        """Block a value; returns False if it was already blocked"""
+        self._check_kind(kind)
+        value = str(value)
+        if kind == 'card' and is_masked_card(value):
+            raise ValueError(f"Masked card number {value} would block every card ending in the same digits; "
+                             "block a full card number or token")
+
+        pipe = self.redis.pipeline()
+        pipe.sadd(_members_key(kind), value)
+        pipe.hset(_reasons_key(kind), value, json.dumps({'reason': reason, 'added_at': time.time()}))
+        pipe.publish(UPDATES_CHANNEL, json.dumps({'action': 'add', 'kind': kind, 'value': value}))
+        added = pipe.execute()[0]
+        return bool(added)
+
+    def remove(self, kind, value):
+        """Unblock a value; returns False if it was not blocked"""
+        self._check_kind(kind)
+        value = str(value)
+
+        pipe = self.redis.pipeline()
+        pipe.srem(_members_key(kind), value)
+        pipe.hdel(_reasons_key(kind), value)
+        pipe.publish(UPDATES_CHANNEL, json.dumps({'action': 'remove', 'kind': kind, 'value': value}))
+        removed = pipe.execute()[0]
+        return bool(removed)
+
+    def add_transaction(self, transaction, kinds=('card', 'user'), reason='Fraud detection'):
+        """Block the given identifiers of a transaction; masked card numbers are skipped"""
+        added = {}
+        for kind in kinds:
+            value = transaction.get(BLOCKLIST_FIELDS[kind])
+            if kind == 'card' and is_masked_card(value):
+                continue
+            if value:
+                added[kind] = self.add(kind, value, reason)
+        return added
+
+    def entries(self, kind, limit=100):
+        """Blocked values of one kind with their reasons"""
+        self._check_kind(kind)
+        values = sorted(self.redis.smembers(_members_key(kind)))[:limit]
+        reasons = self.redis.hmget(_reasons_key(kind), values) if values else []
+        return [
+            {'value': value, **(json.loads(reason) if reason else {})}
+            for value, reason in zip(values, reasons)
+        ]
+
+    def counts(self):
+        return {kind: self.redis.scard(_members_key(kind)) for kind in BLOCKLIST_FIELDS}
+
+
+class EdgeBlocklist:
+    """In-memory blocklist check for the ingestion path.
+
+    Each process keeps a Bloom filter of every blocked value (keyed by
+    kind), loaded from Redis on start and updated from `blocklist:updates`
+    on a background thread. A miss, which is nearly every transaction, is
+    answered from memory in microseconds; a Bloom hit is confirmed with one
+    SISMEMBER so false positives never reject a transaction. Bloom filters
+    cannot delete, so removals and reconnects trigger a full reload, as does
+    `resync_interval` to cover messages missed while disconnected.
+    """
+
+    def __init__(self, redis_client, error_rate=0.001, min_capacity=100000, resync_interval=300):
+        self.redis = redis_client
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.resync_interval = resync_interval
+        self.bloom = BloomFilter(min_capacity, error_rate)
+        self.last_sync = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {'checks': 0, 'bloom_hits': 0, 'confirmed_hits': 0, 'false_positives': 0, 'reloads': 0}
+
+    def _bloom_key(self, kind, value):
+        return f"{kind}:{value}"
+
+    def reload(self):
+        """Rebuild the filter from the Redis sets"""
+        members = {kind: self.redis.smembers(_members_key(kind)) for kind in BLOCKLIST_FIELDS}
+        total = sum(len(values) for values in members.values())
+
+        # Leave headroom so live additions don't push the error rate up before the next reload
+        bloom = BloomFilter(max(self.min_capacity, total * 2), self.error_rate)
+        for kind, values in members.items():
+            for value in values:
+                bloom.add(self._bloom_key(kind, value))
+
+        with self._lock:
+            self.bloom = bloom
+        self.last_sync = time.time()
+        self.stats['reloads'] += 1
+
+    def start(self):
+        """Load the filter and follow updates on a daemon thread, retrying until Redis answers"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._follow_updates, name='blocklist-sync', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def ensure_loaded(self):
+        """Raise until the filter has been loaded once; a readiness check"""
+        if self.last_sync is None:
+            raise RuntimeError(f"Blocklist not loaded yet: {self.last_error or 'waiting for first sync'}")
+
+    def _follow_updates(self):
+        while not self._stop.is_set():
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(UPDATES_CHANNEL)
+                # Anything published before the subscription was live is picked up here
+                self.reload()
+                self.last_error = None
+
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._apply(json.loads(message['data']))
+                    elif time.time() - self.last_sync > self.resync_interval:
+                        self.reload()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Blocklist sync error: {e}")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+    def _apply(self, update):
+        if update['action'] == 'add':
+            with self._lock:
+                self.bloom.add(self._bloom_key(update['kind'], update['value']))
+        else:
+            self.reload()
+
+    def check(self, transaction):
+        """Blocklisted identifiers of a transaction, as a {kind: value} dict"""
+        self.stats['checks'] += 1
+        bloom = self.bloom
+        matches = {}
+
+        for kind, field in BLOCKLIST_FIELDS.items():
+            value = transaction.get(field)
+            if not value or self._bloom_key(kind, value) not in bloom:
+                continue
+
+            self.stats['bloom_hits'] += 1
+            if self.redis.sismember(_members_key(kind), str(value)):
+                self.stats['confirmed_hits'] += 1
+                matches[kind] = value
+            else:
+                self.stats['false_positives'] += 1
+
+        return matches
+
+    def get_stats(self):
+        bloom = self.bloom
+        return {
+            **self.stats,
+            'entries': bloom.count,
+            'capacity': bloom.capacity,
+            'bloom_bytes': len(bloom.bits),
+            'hash_functions': bloom.hashes,
+            'last_sync': self.last_sync,
+            'last_error': self.last_error
+        }
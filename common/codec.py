@@ -0,0 +1,157 @@
+import json
+import os
+import zlib
+
+import msgpack
+import redis
+
+# Values at least this long (packed) are zlib-compressed when that makes them smaller
+COMPRESS_THRESHOLD = int(os.getenv('CACHE_COMPRESS_THRESHOLD', '512'))
+
+# Detail fields live under their own key with a shorter TTL; 0 stops caching them at all
+DETAIL_TTL_SECONDS = int(os.getenv('CACHE_DETAIL_TTL_SECONDS', '600'))
+
+FORMAT_PACKED = 1
+FORMAT_PACKED_ZLIB = 2
+
+# Hot fields are stored positionally (no key names) under `<kind>:<id>`; everything
+# listed in `detail` goes to `detail:<kind>:<id>`. Only append to a schema: the
+# position of a field is its identity in values already in Redis.
+SCHEMAS = {
+    'transaction': {
+        'id': 1,
+        'hot': ['_id', 'trace_id', 'event_id', 'card_number', 'amount', 'merchant', 'location', 'timestamp',
+                'user_id', 'ip_address', 'device_info', 'processed_at', 'risk_profile', 'blocked', 'blocklist_hits'],
+        'detail': ['trace', 'processing_time_ms']
+    },
+    'prediction': {
+        'id': 2,
+        'hot': ['transaction_id', 'trace_id', 'risk_scores', 'prediction', 'confidence', 'risk_level',
+                'should_block', 'timestamp'],
+        'detail': ['components']
+    },
+    'blocked': {
+        'id': 3,
+        'hot': ['transaction_id', 'blocked_at', 'reason', 'status'],
+        'detail': []
+    }
+}
+
+_SCHEMAS_BY_ID = {schema['id']: schema for schema in SCHEMAS.values()}
+
+
+def _pack(schema_id, fields, values):
+    """[presence bitmap, present values..., extra fields] as msgpack with a 2-byte header"""
+    present, packed = 0, []
+    for i, field in enumerate(fields):
+        if field in values:
+            present |= 1 << i
+            packed.append(values[field])
+    extra = {key: value for key, value in values.items() if key not in fields}
+
+    body = msgpack.packb([present, packed, extra] if extra else [present, packed], default=str)
+    if len(body) >= COMPRESS_THRESHOLD:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            return bytes([FORMAT_PACKED_ZLIB, schema_id]) + compressed
+    return bytes([FORMAT_PACKED, schema_id]) + body
+
+
+def encode(kind, document, fields=None):
+    """Binary encoding of a document (or the given subset of its fields) for one schema"""
+    schema = SCHEMAS[kind]
+    return _pack(schema['id'], schema['hot'] if fields is None else fields, document)
+
+
+def decode(raw, fields=None):
+    """Decode a value written by `encode`, or a plain JSON value written before the codec"""
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.encode()
+    if raw[:1] in (b'{', b'['):
+        return json.loads(raw)
+
+    format_id, schema_id, body = raw[0], raw[1], raw[2:]
+    if format_id == FORMAT_PACKED_ZLIB:
+        body = zlib.decompress(body)
+    elif format_id != FORMAT_PACKED:
+        raise ValueError(f"Unknown cache value format: {format_id}")
+
+    unpacked = msgpack.unpackb(body, strict_map_key=False)
+    present, packed = unpacked[0], unpacked[1]
+    if fields is None:
+        fields = _SCHEMAS_BY_ID[schema_id]['hot']
+
+    document, values = {}, iter(packed)
+    for i, field in enumerate(fields):
+        if present & (1 << i):
+            document[field] = next(values)
+    if len(unpacked) > 2:
+        document.update(unpacked[2])
+    return document
+
+
+class DocumentCache:
+    """Compact Redis cache for transactions, predictions and blocks.
+
+    `set` splits a document into hot fields, stored positionally in msgpack
+    (zlib-compressed past `COMPRESS_THRESHOLD`) under `<kind>:<id>`, and
+    detail fields such as the per-model prediction components, stored the
+    same way under `detail:<kind>:<id>` with the shorter
+    `DETAIL_TTL_SECONDS`. `get` decodes either format, including plain JSON
+    left by older writers, and merges detail back in on request. Binary
+    values need a client without `decode_responses`, so the cache opens its
+    own connection to the same server.
+    """
+
+    def __init__(self, redis_client, detail_ttl=DETAIL_TTL_SECONDS):
+        # Same connection settings and class (TCP, TLS or unix socket), only returning bytes
+        pool = redis_client.connection_pool
+        kwargs = {key: value for key, value in pool.connection_kwargs.items() if key != 'decode_responses'}
+        self.redis = redis.Redis(connection_pool=redis.ConnectionPool(connection_class=pool.connection_class, **kwargs))
+        self.detail_ttl = detail_ttl
+
+    def key(self, kind, doc_id):
+        return f"{kind}:{doc_id}"
+
+    def detail_key(self, kind, doc_id):
+        return f"detail:{kind}:{doc_id}"
+
+    def set(self, kind, doc_id, document, ttl=3600):
+        """Cache a document's hot fields, and its detail fields if it has any"""
+        schema = SCHEMAS[kind]
+        detail = {field: document[field] for field in schema['detail'] if field in document}
+        hot = {field: value for field, value in document.items() if field not in schema['detail']}
+
+        pipe = self.redis.pipeline()
+        pipe.setex(self.key(kind, doc_id), ttl, encode(kind, hot))
+        if detail and self.detail_ttl:
+            pipe.setex(self.detail_key(kind, doc_id), min(ttl, self.detail_ttl),
+                       encode(kind, detail, schema['detail']))
+        pipe.execute()
+
+    def get(self, kind, doc_id, detail=False):
+        return self.get_many(kind, [doc_id], detail)[0]
+
+    def get_many(self, kind, doc_ids, detail=False):
+        """Decode several documents in one round trip; missing ones come back as None"""
+        if not doc_ids:
+            return []
+
+        documents = [decode(raw) for raw in self.redis.mget([self.key(kind, doc_id) for doc_id in doc_ids])]
+        if detail and SCHEMAS[kind]['detail']:
+            details = self.redis.mget([self.detail_key(kind, doc_id) for doc_id in doc_ids])
+            for document, raw in zip(documents, details):
+                if document is not None and raw is not None:
+                    document.update(decode(raw, SCHEMAS[kind]['detail']))
+        return documents
+
+    def ids(self, kind, limit=None):
+        """Ids of cached documents of one kind, without blocking Redis like KEYS"""
+        ids = []
+        for key in self.redis.scan_iter(match=f"{kind}:*", count=1000):
+            ids.append(key.decode().split(':', 1)[1])
+            if limit and len(ids) >= limit:
+                break
+        return ids
@@ -0,0 +1,181 @@
+import asyncio
+import inspect
+import json
+import os
+
+import redis.asyncio as aioredis
+from fastapi.responses import StreamingResponse
+
+REPLAY_SIZE = 50
+HEARTBEAT_SECONDS = 15
+CLIENT_QUEUE_SIZE = 100
+
+# Dashboards are served from another origin than the services
+ALLOW_ORIGIN = os.getenv('LIVE_FEED_ALLOW_ORIGIN', '*')
+
+
+def _channel(feed):
+    return f"live:{feed}"
+
+
+def _replay_key(feed):
+    return f"live:replay:{feed}"
+
+
+def _sequence_key(feed):
+    return f"live:seq:{feed}"
+
+
+def publish_event(redis_client, feed, data):
+    """Publish an event to a live feed and keep it in the feed's replay window"""
+    try:
+        event = json.dumps({'id': redis_client.incr(_sequence_key(feed)), 'data': data}, default=str)
+        pipe = redis_client.pipeline()
+        pipe.lpush(_replay_key(feed), event)
+        pipe.ltrim(_replay_key(feed), 0, REPLAY_SIZE - 1)
+        pipe.publish(_channel(feed), event)
+        pipe.execute()
+    except Exception as e:
+        print(f"Error publishing {feed} event: {e}")
+
+
+def feed_positions(redis_client, feeds):
+    """Id of the latest event published on each feed; events up to it are already in the stats counters"""
+    values = redis_client.mget([_sequence_key(feed) for feed in feeds])
+    return {feed: int(value or 0) for feed, value in zip(feeds, values)}
+
+
+def async_client_like(redis_client):
+    """Async client with a sync client's connection settings: TCP, TLS or unix socket, credentials and timeouts"""
+    pool = redis_client.connection_pool
+    connection_class = getattr(aioredis.connection, pool.connection_class.__name__, aioredis.Connection)
+    accepted = {
+        name
+        for cls in connection_class.__mro__ if '__init__' in vars(cls)
+        for name in inspect.signature(cls.__init__).parameters
+    }
+    # Callables and retry policies are built for the sync client, so the async defaults are kept
+    kwargs = {
+        key: value for key, value in pool.connection_kwargs.items()
+        if key in accepted and key not in ('retry', 'redis_connect_func', 'decode_responses')
+    }
+    return aioredis.Redis(
+        connection_pool=aioredis.ConnectionPool(connection_class=connection_class, decode_responses=True, **kwargs),
+        decode_responses=True
+    )
+
+
+def _sse(event):
+    return f"id: {event['id']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class LiveFeed:
+    """Server-Sent Events fan-out of Redis pub/sub feeds.
+
+    Each service process holds a single Redis subscription for the feeds it
+    serves and copies every message onto the bounded queue of each connected
+    client, so the number of dashboards never changes the load on Redis or
+    Mongo. A new client (or an EventSource reconnecting with Last-Event-ID)
+    first receives the newer events from the feed's replay window. A client
+    that falls `CLIENT_QUEUE_SIZE` events behind is disconnected and catches
+    up from the replay window when the browser reconnects.
+    """
+
+    def __init__(self, redis_client, feeds, subscriber=None):
+        self.redis = redis_client
+        self.feeds = list(feeds)
+        if subscriber is None:
+            subscriber = async_client_like(redis_client)
+        self.subscriber = subscriber
+        self.clients = {feed: set() for feed in self.feeds}
+        self.stats = {'events': 0, 'dropped_clients': 0}
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        """Relay the service's one subscription to every connected client"""
+        while True:
+            pubsub = self.subscriber.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*[_channel(feed) for feed in self.feeds])
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    feed = message['channel'].split(':', 1)[1]
+                    self._fan_out(feed, json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Live feed subscription error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def _fan_out(self, feed, event):
+        self.stats['events'] += 1
+        for queue in list(self.clients.get(feed, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up; it resumes from the replay window on reconnect
+                self.clients[feed].discard(queue)
+                self.stats['dropped_clients'] += 1
+
+    def replay(self, feed, last_event_id=None):
+        """Events in the replay window newer than `last_event_id`, oldest first"""
+        events = [json.loads(raw) for raw in reversed(self.redis.lrange(_replay_key(feed), 0, -1))]
+        if last_event_id is not None:
+            events = [event for event in events if event['id'] > last_event_id]
+        return events
+
+    async def events(self, feed, request, last_event_id=None):
+        """SSE stream for one client: replay, then live events until it disconnects"""
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        # Register before reading the replay window so nothing falls between the two
+        self.clients[feed].add(queue)
+        try:
+            last_sent = last_event_id or 0
+            for event in self.replay(feed, last_event_id):
+                last_sent = event['id']
+                yield _sse(event)
+
+            while queue in self.clients[feed] or not queue.empty():
+                if await request.is_disconnected():
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event['id'] > last_sent:
+                    last_sent = event['id']
+                    yield _sse(event)
+        finally:
+            self.clients[feed].discard(queue)
+
+    def response(self, feed, request):
+        """StreamingResponse for a feed, resuming from the Last-Event-ID header"""
+        if feed not in self.clients:
+            raise ValueError(f"Unknown live feed: {feed}")
+
+        last_event_id = request.headers.get('last-event-id')
+        return StreamingResponse(
+            self.events(feed, request, int(last_event_id) if last_event_id and last_event_id.isdigit() else None),
+            media_type='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+                'Access-Control-Allow-Origin': ALLOW_ORIGIN
+            }
+        )
+
+    def get_stats(self):
+        return {**self.stats, 'clients': {feed: len(queues) for feed, queues in self.clients.items()}}
@@ -0,0 +1,157 @@
+import time
+
+# Bucket width in seconds and how long buckets are kept, per resolution
+RESOLUTIONS = {
+    'minute': (60, 2 * 24 * 3600),
+    'hour': (3600, 30 * 24 * 3600)
+}
+
+# Windows up to this many minutes are answered from minute buckets, longer ones from hour buckets
+MINUTE_RESOLUTION_LIMIT = 180
+
+RISK_LEVELS = ['LOW', 'MEDIUM', 'HIGH']
+
+
+def _bucket_key(resolution, bucket):
+    return f"stats:{resolution}:{bucket}"
+
+
+def _increment(redis_client, counters, amounts=None, timestamp=None):
+    """Add to the current minute and hour buckets of every resolution in one round trip"""
+    now = timestamp or time.time()
+    try:
+        pipe = redis_client.pipeline()
+        for resolution, (width, retention) in RESOLUTIONS.items():
+            key = _bucket_key(resolution, int(now // width) * width)
+            for field, value in counters.items():
+                pipe.hincrby(key, field, value)
+            for field, value in (amounts or {}).items():
+                pipe.hincrbyfloat(key, field, value)
+            pipe.expire(key, retention)
+        pipe.execute()
+    except Exception as e:
+        print(f"Error updating stats: {e}")
+
+
+def record_transaction(redis_client, transaction, blocklisted=False):
+    """Count an ingested transaction and its amount by merchant and location"""
+    amount = float(transaction.get('amount', 0) or 0)
+    merchant = transaction.get('merchant', 'Unknown')
+    location = transaction.get('location', 'Unknown')
+    counters = {
+        'transactions': 1,
+        f"merchant_count:{merchant}": 1,
+        f"location_count:{location}": 1
+    }
+    if blocklisted:
+        counters['blocklisted'] = 1
+
+    _increment(redis_client, counters, {
+        'amount': amount,
+        f"merchant_amount:{merchant}": amount,
+        f"location_amount:{location}": amount
+    })
+
+
+def record_prediction(redis_client, prediction):
+    """Count a scored transaction by risk level, and whether it was shed to the degraded score"""
+    counters = {'predictions': 1, f"risk:{prediction.get('risk_level', 'LOW')}": 1}
+    if prediction.get('should_block'):
+        counters['should_block'] = 1
+    if prediction.get('degraded'):
+        counters['shed'] = 1
+
+    _increment(redis_client, counters, {
+        'fraud_score_sum': float(prediction.get('risk_scores', {}).get('fraudulent', 0))
+    })
+
+
+def record_alert(redis_client, blocked):
+    """Count an alert and, if it was blocked, the block"""
+    counters = {'alerts': 1}
+    if blocked:
+        counters['blocked'] = 1
+    _increment(redis_client, counters)
+
+
+def _top(breakdown, top):
+    return [
+        {'name': name, **values}
+        for name, values in sorted(breakdown.items(), key=lambda item: item[1]['amount'], reverse=True)[:top]
+    ]
+
+
+def get_stats(redis_client, window_minutes=60, top=10, now=None):
+    """Totals, rates, breakdowns and a per-bucket series for the last `window_minutes`.
+
+    Reads one Redis hash per bucket in the window, so the cost depends on the
+    window length and resolution, never on how many events it covers.
+    """
+    now = now or time.time()
+    resolution = 'minute' if window_minutes <= MINUTE_RESOLUTION_LIMIT else 'hour'
+    width, retention = RESOLUTIONS[resolution]
+    window_minutes = max(1, min(window_minutes, retention // 60))
+
+    last = int(now // width) * width
+    first = int((now - window_minutes * 60) // width) * width + width
+    buckets = list(range(min(first, last), last + width, width))
+
+    pipe = redis_client.pipeline()
+    for bucket in buckets:
+        pipe.hgetall(_bucket_key(resolution, bucket))
+    hashes = pipe.execute()
+
+    totals = {}
+    merchants, locations = {}, {}
+    series = []
+
+    for bucket, fields in zip(buckets, hashes):
+        point = {}
+        for field, value in fields.items():
+            value = float(value)
+            if field.startswith(('merchant_', 'location_')):
+                prefix, name = field.split(':', 1)
+                breakdown = merchants if prefix.startswith('merchant') else locations
+                entry = breakdown.setdefault(name, {'count': 0, 'amount': 0.0})
+                if prefix.endswith('count'):
+                    entry['count'] += int(value)
+                else:
+                    entry['amount'] += value
+            else:
+                point[field] = value
+                totals[field] = totals.get(field, 0) + value
+
+        predictions = point.get('predictions', 0)
+        series.append({
+            'timestamp': bucket,
+            'transactions': int(point.get('transactions', 0)),
+            'amount': point.get('amount', 0.0),
+            'predictions': int(predictions),
+            'blocked': int(point.get('blocked', 0)),
+            'shed': int(point.get('shed', 0)),
+            'avg_fraud_score': point.get('fraud_score_sum', 0) / predictions if predictions else 0
+        })
+
+    transactions = totals.get('transactions', 0)
+    predictions = totals.get('predictions', 0)
+
+    return {
+        'window_minutes': window_minutes,
+        'resolution': resolution,
+        'buckets': len(buckets),
+        'transactions': int(transactions),
+        'amount': totals.get('amount', 0.0),
+        'predictions': int(predictions),
+        'risk_levels': {level: int(totals.get(f"risk:{level}", 0)) for level in RISK_LEVELS},
+        'alerts': int(totals.get('alerts', 0)),
+        'blocked': int(totals.get('blocked', 0)),
+        'blocklisted': int(totals.get('blocklisted', 0)),
+        'shed': int(totals.get('shed', 0)),
+        'shed_rate': totals.get('shed', 0) / predictions if predictions else 0,
+        'fraud_rate': totals.get('risk:HIGH', 0) / predictions if predictions else 0,
+        'block_rate': totals.get('blocked', 0) / transactions if transactions else 0,
+        'avg_fraud_score': totals.get('fraud_score_sum', 0) / predictions if predictions else 0,
+        'top_merchants': _top(merchants, top),
+        'top_locations': _top(locations, top),
+        'series': series
+    }
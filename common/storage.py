@@ -0,0 +1,141 @@
+import os
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+# Documents older than this many days are removed by Mongo's TTL monitor (0 keeps them forever)
+RETENTION_DAYS = {
+    'transactions': int(os.getenv('TRANSACTION_RETENTION_DAYS', '30')),
+    'alerts': int(os.getenv('ALERT_RETENTION_DAYS', '90')),
+    'blocked_transactions': int(os.getenv('BLOCKED_RETENTION_DAYS', '365'))
+}
+
+# TTL indexes need a BSON date, so each stored document gets one alongside its ISO timestamps
+STORED_AT_FIELD = 'stored_at'
+
+# Server error code for an index that exists with different options
+INDEX_OPTIONS_CONFLICT = 85
+
+# Secondary indexes per collection; `_id` ordering (the /recent endpoints, incremental reads) uses the default index
+INDEXES = {
+    'transactions': [
+        [('timestamp', DESCENDING)],
+        [('user_id', ASCENDING), ('_id', DESCENDING)],
+        [('card_number', ASCENDING), ('_id', DESCENDING)]
+    ],
+    'alerts': [
+        [('transaction_id', ASCENDING)],
+        [('prediction.risk_level', ASCENDING), ('_id', DESCENDING)],
+        [('transaction.user_id', ASCENDING), ('_id', DESCENDING)]
+    ],
+    'blocked_transactions': [
+        [('transaction_id', ASCENDING)]
+    ]
+}
+
+# Every query the services run, as name: (collection, filter built from the caller's parameters, sort,
+# default limit, example parameters). Services run them through `find_shape`, and check_indexes.py
+# explains each one with its example parameters, so the checked queries are the ones actually run
+QUERY_SHAPES = {
+    'ingestion: recent transactions': (
+        'transactions', lambda: {}, [('_id', DESCENDING)], 50, {}),
+    'ingestion: recent transactions for a user': (
+        'transactions', lambda user_id: {'user_id': user_id}, [('_id', DESCENDING)], 50, {'user_id': 'user_1000'}),
+    'risk engine: training window': (
+        'transactions', lambda: {}, [('_id', DESCENDING)], 1000, {}),
+    'llm: replay buffer seed': (
+        'transactions', lambda: {}, [('_id', DESCENDING)], 10000, {}),
+    'llm: replay buffer catch-up': (
+        'transactions', lambda last_id: {'_id': {'$gt': ObjectId(last_id)}}, [('_id', ASCENDING)], 10000,
+        {'last_id': '0' * 24}),
+    'alerts: recent alerts': (
+        'alerts', lambda: {}, [('_id', DESCENDING)], 50, {}),
+    'alerts: recent alerts by risk level': (
+        'alerts', lambda risk_level: {'prediction.risk_level': risk_level}, [('_id', DESCENDING)], 50,
+        {'risk_level': 'HIGH'}),
+    'alerts: alerts for a transaction': (
+        'alerts', lambda transaction_id: {'transaction_id': transaction_id}, None, 0, {'transaction_id': 'unknown'}),
+    'alerts: blocks for a transaction': (
+        'blocked_transactions', lambda transaction_id: {'transaction_id': transaction_id}, None, 0,
+        {'transaction_id': 'unknown'}),
+    'alerts: recent blocks': (
+        'blocked_transactions', lambda: {}, [('_id', DESCENDING)], 50, {})
+}
+
+
+def find_shape(collection, name, limit=None, **params):
+    """Cursor for the query shape `name` on `collection`, with its filter built from `params`"""
+    collection_name, build_filter, sort, default_limit, _ = QUERY_SHAPES[name]
+    if collection.name != collection_name:
+        raise ValueError(f"Query shape {name!r} is for {collection_name}, not {collection.name}")
+
+    cursor = collection.find(build_filter(**params))
+    if sort:
+        cursor = cursor.sort(sort)
+    limit = default_limit if limit is None else limit
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+
+def with_stored_at(document):
+    """Copy of a document with the TTL date field set, leaving the original JSON-serialisable"""
+    return {**document, STORED_AT_FIELD: datetime.now(timezone.utc)}
+
+
+def _has_ttl(collection):
+    return any(dict(index['key']) == {STORED_AT_FIELD: 1} for index in collection.list_indexes())
+
+
+def _backfill_stored_at(collection):
+    """Date documents written before the TTL field existed by their `_id`, so they expire too"""
+    result = collection.update_many(
+        {STORED_AT_FIELD: {'$exists': False}},
+        [{'$set': {STORED_AT_FIELD: {'$toDate': '$_id'}}}]
+    )
+    if result.modified_count:
+        print(f"Backfilled {STORED_AT_FIELD} on {result.modified_count} {collection.name} documents")
+
+
+def _ensure_ttl(collection, days):
+    """Create the TTL index, or update its expiry if the retention setting changed"""
+    seconds = days * 24 * 3600
+    existed = _has_ttl(collection)
+    try:
+        collection.create_index([(STORED_AT_FIELD, ASCENDING)], expireAfterSeconds=seconds)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        # An existing TTL index with a different expiry can't be recreated, only modified
+        collection.database.command(
+            'collMod', collection.name,
+            index={'keyPattern': {STORED_AT_FIELD: 1}, 'expireAfterSeconds': seconds}
+        )
+
+    # Only when the index is new: the filter has no index to use, so this scans the collection
+    if not existed:
+        _backfill_stored_at(collection)
+
+
+def _drop_ttl(collection):
+    for index in collection.list_indexes():
+        if dict(index['key']) == {STORED_AT_FIELD: 1} and 'expireAfterSeconds' in index:
+            collection.drop_index(index['name'])
+
+
+def ensure_indexes(db, collections=None):
+    """Create the secondary and TTL indexes for the given finshield collections.
+
+    Index creation is idempotent, so every service calls this on startup for
+    the collections it reads or writes.
+    """
+    for name in collections or INDEXES:
+        collection = db[name]
+        for keys in INDEXES[name]:
+            collection.create_index(keys)
+        if RETENTION_DAYS[name] > 0:
+            _ensure_ttl(collection, RETENTION_DAYS[name])
+        else:
+            _drop_ttl(collection)
@@ -0,0 +1,126 @@
+import json
+import time
+import uuid
+
+import numpy as np
+
+# Pipeline stages in the order a transaction passes through them; `alert_received` is when the alert
+# service accepted the alert, `notified` when the first notification covering it was delivered
+STAGES = ['ingested', 'produced', 'consumed', 'scored', 'alert_received', 'notified']
+
+TRACES_KEY = 'pipeline:traces'
+CONSUMER_LAG_KEY = 'pipeline:consumer_lag'
+MAX_TRACES = 5000
+
+
+def start_trace(transaction):
+    """Attach a correlation id and the `ingested` timestamp to a transaction"""
+    transaction.setdefault('trace_id', uuid.uuid4().hex)
+    transaction.setdefault('trace', {})['ingested'] = time.time()
+    return transaction
+
+
+def stamp_stage(transaction, stage):
+    """Record the time a transaction reached a pipeline stage"""
+    transaction.setdefault('trace', {})[stage] = time.time()
+    return transaction
+
+
+def record_trace(redis_client, transaction):
+    """Push the transaction's stage timestamps for the latency aggregator"""
+    if 'trace_id' not in transaction:
+        return
+
+    try:
+        pipe = redis_client.pipeline()
+        pipe.lpush(TRACES_KEY, json.dumps({
+            'trace_id': transaction['trace_id'],
+            'trace': transaction.get('trace', {})
+        }))
+        pipe.ltrim(TRACES_KEY, 0, MAX_TRACES - 1)
+        pipe.execute()
+    except Exception as e:
+        print(f"Error recording trace: {e}")
+
+
+def record_stage(redis_client, trace_ids, stage):
+    """Record that several traced transactions reached a stage now, e.g. one digest covering them all.
+
+    When a stage is recorded more than once for a trace, the earliest time is
+    the one the latency aggregator keeps.
+    """
+    if not trace_ids:
+        return
+
+    try:
+        now = time.time()
+        pipe = redis_client.pipeline()
+        for trace_id in trace_ids:
+            pipe.lpush(TRACES_KEY, json.dumps({'trace_id': trace_id, 'trace': {stage: now}}))
+        pipe.ltrim(TRACES_KEY, 0, MAX_TRACES - 1)
+        pipe.execute()
+    except Exception as e:
+        print(f"Error recording trace: {e}")
+
+
+def record_consumer_lag(redis_client, partition, lag):
+    """Store the latest Kafka consumer lag seen for a partition"""
+    try:
+        redis_client.hset(CONSUMER_LAG_KEY, str(partition), json.dumps({
+            'lag': lag,
+            'updated_at': time.time()
+        }))
+    except Exception as e:
+        print(f"Error recording consumer lag: {e}")
+
+
+def _percentiles(values):
+    """Latency percentiles in milliseconds"""
+    if not values:
+        return {'count': 0}
+
+    ms = np.array(values) * 1000
+    return {
+        'count': len(values),
+        'p50': float(np.percentile(ms, 50)),
+        'p90': float(np.percentile(ms, 90)),
+        'p99': float(np.percentile(ms, 99)),
+        'max': float(ms.max())
+    }
+
+
+def compute_latency_stats(redis_client, limit=1000):
+    """Aggregate end-to-end and per-hop latency over the most recent traces"""
+    # Services record partial traces along the way; merge them per correlation id
+    traces = {}
+    for raw in redis_client.lrange(TRACES_KEY, 0, limit - 1):
+        entry = json.loads(raw)
+        trace = traces.setdefault(entry['trace_id'], {})
+        for stage, at in entry['trace'].items():
+            trace[stage] = min(at, trace.get(stage, at))
+
+    end_to_end = []
+    hops = {f"{a}->{b}": [] for a, b in zip(STAGES, STAGES[1:])}
+
+    for trace in traces.values():
+        reached = [stage for stage in STAGES if stage in trace]
+        if len(reached) < 2:
+            continue
+
+        end_to_end.append(trace[reached[-1]] - trace[reached[0]])
+        for a, b in zip(STAGES, STAGES[1:]):
+            if a in trace and b in trace:
+                hops[f"{a}->{b}"].append(trace[b] - trace[a])
+
+    consumer_lag = {
+        partition: json.loads(value)
+        for partition, value in redis_client.hgetall(CONSUMER_LAG_KEY).items()
+    }
+
+    return {
+        'traces': len(traces),
+        'end_to_end_ms': _percentiles(end_to_end),
+        'hops_ms': {hop: _percentiles(values) for hop, values in hops.items()},
+        'consumer_lag': consumer_lag,
+        'total_consumer_lag': sum(entry['lag'] for entry in consumer_lag.values())
+    }
@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class LazyClient:
+    """Creates a client on first use instead of at import.
+
+    Attribute access is forwarded to the client, so a module-level
+    `producer = LazyClient(lambda: KafkaProducer(...))` is used exactly like
+    the client itself. Creation is thread-safe and retried on the next use
+    if it failed; `get()` creates it ahead of time, e.g. from a warm-up.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        return self._client is not None
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class Readiness:
+    """Background warm-up of a service's dependencies, for /livez and /readyz.
+
+    Each component is a blocking `warm()` callable (open a connection, load a
+    model). `start()` runs every component on its own daemon thread and
+    retries failures with capped exponential backoff, so the process answers
+    /livez straight away and /readyz once all required components are warm.
+    Optional components are reported but never hold readiness back.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.started_at = time.time()
+        self.components = {}
+        self._threads = []
+
+    def add(self, name, warm, required=True, retry_seconds=1.0, max_retry_seconds=30.0):
+        self.components[name] = {
+            'warm': warm,
+            'required': required,
+            'retry_seconds': retry_seconds,
+            'max_retry_seconds': max_retry_seconds,
+            'ready': False,
+            'attempts': 0,
+            'error': None,
+            'seconds': None
+        }
+
+    def _warm(self, name):
+        component = self.components[name]
+        delay = component['retry_seconds']
+        while True:
+            component['attempts'] += 1
+            try:
+                component['warm']()
+                component['ready'] = True
+                component['error'] = None
+                component['seconds'] = round(time.time() - self.started_at, 3)
+                print(f"{self.service}: {name} ready after {component['seconds']}s")
+                return
+            except Exception as e:
+                component['error'] = str(e)
+                print(f"{self.service}: {name} not ready ({e}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, component['max_retry_seconds'])
+
+    def start(self):
+        """Warm every component in the background; returns immediately"""
+        for name in self.components:
+            thread = threading.Thread(target=self._warm, args=(name,), name=f"warmup-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def is_ready(self, name=None):
+        if name is not None:
+            return self.components[name]['ready']
+        return all(c['ready'] for c in self.components.values() if c['required'])
+
+    def liveness(self):
+        return {'status': 'alive', 'service': self.service, 'uptime_seconds': round(time.time() - self.started_at, 3)}
+
+    def status(self):
+        return {
+            'ready': self.is_ready(),
+            'service': self.service,
+            'components': {
+                name: {key: c[key] for key in ('ready', 'required', 'attempts', 'error', 'seconds')}
+                for name, c in self.components.items()
+            }
+        }
@@ -5,6 +5,7 @@ import RiskScores from './components/RiskScores';
 import AlertPanel from './components/AlertPanel';
 import SystemControl from './components/SystemControl';
 import axios from 'axios';
+import { useLiveFeedSince } from './useLiveFeed';
 
 function App() {
   const [activeTab, setActiveTab] = useState('dashboard');
@@ -26,15 +27,23 @@ function App() {
     checkSystemHealth();
     fetchStats();
     
-    // Poll for updates every 30 seconds
+    // Health is still polled; the counters below are kept current by the live feeds
     const interval = setInterval(() => {
       checkSystemHealth();
-      fetchStats();
     }, 30000);
 
     return () => clearInterval(interval);
   }, []);
 
+  const countEvent = (field) => () => {
+    setStats((previous) => ({ ...previous, [field]: previous[field] + 1 }));
+  };
+
+  // Only events newer than the /stats snapshot are counted, not the ones replayed on connect
+  const transactionsSince = useLiveFeedSince('http://localhost:8001/stream/transactions', countEvent('totalTransactions'));
+  const alertsSince = useLiveFeedSince('http://localhost:8003/stream/alerts', countEvent('alertsSent'));
+  const blockedSince = useLiveFeedSince('http://localhost:8003/stream/blocked', countEvent('blockedTransactions'));
+
   const checkSystemHealth = async () => {
     const services = [
       { name: 'ingestion', url: 'http://localhost:8001/health' },
@@ -59,28 +68,23 @@ function App() {
 
   const fetchStats = async () => {
     try {
-      // Fetch from various endpoints
-      const [transactions, alerts, blocked] = await Promise.all([
-        axios.get('http://localhost:8001/transactions/recent?limit=100').catch(() => ({ data: [] })),
-        axios.get('http://localhost:8003/alerts/recent?limit=100').catch(() => ({ data: [] })),
-        axios.get('http://localhost:8003/blocked/recent?limit=100').catch(() => ({ data: [] }))
-      ]);
-
-      const totalTransactions = transactions.data.length || 0;
-      const alertsSent = alerts.data.length || 0;
-      const blockedTransactions = blocked.data.length || 0;
-      
-      // Calculate average risk score
-      const avgRiskScore = totalTransactions > 0 ? Math.random() * 0.3 + 0.1 : 0;
-
-      setStats({
-        totalTransactions,
-        blockedTransactions,
-        alertsSent,
-        riskScore: avgRiskScore
-      });
+      // Counters are maintained by the services in Redis; this reads the last 24 hours
+      const response = await axios.get('http://localhost:8001/stats?window=1440');
+      const { transactions: totalTransactions, alerts: alertsSent, blocked: blockedTransactions } = response.data;
+      const avgRiskScore = response.data.avg_fraud_score;
+      const positions = response.data.feed_positions || {};
+
+      setStats({ totalTransactions, blockedTransactions, alertsSent, riskScore: avgRiskScore });
+      // Then add the live events published since these counters were read
+      transactionsSince(positions.transactions);
+      alertsSince(positions.alerts);
+      blockedSince(positions.blocked);
     } catch (error) {
       console.error('Error fetching stats:', error);
+      // No snapshot to add to; count from whatever the feeds deliver
+      transactionsSince(0);
+      alertsSince(0);
+      blockedSince(0);
     }
   };
 
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import moment from 'moment';
+import useLiveFeed, { mergeLatest } from '../useLiveFeed';
 
 const AlertPanel = () => {
   const [alerts, setAlerts] = useState([]);
@@ -10,15 +11,17 @@ const AlertPanel = () => {
 
   useEffect(() => {
     fetchAlertData();
-    
-    // Auto-refresh every 10 seconds
-    const interval = setInterval(() => {
-      fetchAlertData();
-    }, 10000);
-
-    return () => clearInterval(interval);
   }, []);
 
+  // New alerts and blocks are pushed by the alert service instead of re-fetched
+  useLiveFeed('http://localhost:8003/stream/alerts', (alert) => {
+    setAlerts((previous) => mergeLatest(previous, alert, 'transaction_id', 50));
+  });
+
+  useLiveFeed('http://localhost:8003/stream/blocked', (blocked) => {
+    setBlockedTransactions((previous) => mergeLatest(previous, blocked, 'transaction_id', 50));
+  });
+
   const fetchAlertData = async () => {
     try {
       const [alertsResponse, blockedResponse] = await Promise.all([
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, PieChart, Pie, Cell, BarChart, Bar } from 'recharts';
 import axios from 'axios';
+import { useLiveFeedSince } from '../useLiveFeed';
 
 const Dashboard = ({ stats, systemStatus }) => {
   const [realtimeData, setRealtimeData] = useState([]);
@@ -9,53 +10,110 @@ const Dashboard = ({ stats, systemStatus }) => {
 
   useEffect(() => {
     fetchDashboardData();
-    
-    // Update every 10 seconds
-    const interval = setInterval(() => {
-      fetchDashboardData();
-    }, 10000);
-
-    return () => clearInterval(interval);
   }, []);
 
+  // Fold live events into the current minute of the real-time chart
+  const updateCurrentMinute = (update) => {
+    setRealtimeData((previous) => {
+      const time = new Date().toLocaleTimeString('en-US', { hour12: false, hour: '2-digit', minute: '2-digit' });
+      const last = previous[previous.length - 1];
+      const isCurrent = last && last.time === time;
+      const current = isCurrent ? last : { time, transactions: 0, blocked: 0, riskScore: 0, scored: 0 };
+      return [...(isCurrent ? previous.slice(0, -1) : previous), update(current)].slice(-24);
+    });
+  };
+
+  // Events replayed on connect are already in the /stats series, so only later ones are folded in
+  const transactionsSince = useLiveFeedSince('http://localhost:8001/stream/transactions', () => {
+    updateCurrentMinute((minute) => ({ ...minute, transactions: minute.transactions + 1 }));
+  });
+
+  const predictionsSince = useLiveFeedSince('http://localhost:8002/stream/predictions', (prediction) => {
+    updateCurrentMinute((minute) => {
+      const scored = (minute.scored || 0) + 1;
+      return {
+        ...minute,
+        blocked: minute.blocked + (prediction.should_block ? 1 : 0),
+        riskScore: minute.riskScore + (prediction.risk_scores.fraudulent - minute.riskScore) / scored,
+        scored
+      };
+    });
+  });
+
+  const formatMinute = (timestamp) =>
+    new Date(timestamp * 1000).toLocaleTimeString('en-US', { hour12: false, hour: '2-digit', minute: '2-digit' });
+
   const fetchDashboardData = async () => {
     try {
-      // Generate mock real-time data for demo
-      const now = new Date();
-      const newData = [];
-      
-      for (let i = 23; i >= 0; i--) {
-        const time = new Date(now.getTime() - i * 60000);
-        newData.push({
-          time: time.toLocaleTimeString('en-US', { hour12: false, hour: '2-digit', minute: '2-digit' }),
-          transactions: Math.floor(Math.random() * 50) + 10,
-          blocked: Math.floor(Math.random() * 5),
-          riskScore: Math.random() * 0.3 + 0.1
-        });
-      }
-      
-      setRealtimeData(newData);
-
-      // Risk distribution data
-      setRiskDistribution([
-        { name: 'Low Risk', value: 70, color: '#10B981' },
-        { name: 'Medium Risk', value: 25, color: '#F59E0B' },
-        { name: 'High Risk', value: 5, color: '#EF4444' }
+      // Time-bucketed counters maintained by the services; no collection scans
+      const [recent, daily] = await Promise.all([
+        axios.get('http://localhost:8001/stats?window=24'),
+        axios.get('http://localhost:8001/stats?window=1440')
       ]);
 
-      // Transaction volume by hour
-      const volumeData = [];
-      for (let hour = 0; hour < 24; hour++) {
-        volumeData.push({
-          hour: `${hour.toString().padStart(2, '0')}:00`,
-          volume: Math.floor(Math.random() * 200) + 50
-        });
-      }
-      setTransactionVolume(volumeData);
+      setRealtimeData(recent.data.series.map((point) => ({
+        time: formatMinute(point.timestamp),
+        transactions: point.transactions,
+        blocked: point.blocked,
+        riskScore: point.avg_fraud_score,
+        scored: point.predictions
+      })));
+      transactionsSince(recent.data.feed_positions?.transactions);
+      predictionsSince(recent.data.feed_positions?.predictions);
 
+      const levels = daily.data.risk_levels;
+      setRiskDistribution([
+        { name: 'Low Risk', value: levels.LOW, color: '#10B981' },
+        { name: 'Medium Risk', value: levels.MEDIUM, color: '#F59E0B' },
+        { name: 'High Risk', value: levels.HIGH, color: '#EF4444' }
+      ]);
+
+      setTransactionVolume(daily.data.series.map((point) => ({
+        hour: `${new Date(point.timestamp * 1000).getHours().toString().padStart(2, '0')}:00`,
+        volume: point.transactions
+      })));
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
+      generateMockDashboardData();
+      transactionsSince(0);
+      predictionsSince(0);
+    }
+  };
+
+  // Demo data for when the stats endpoint is unreachable
+  const generateMockDashboardData = () => {
+    // Generate mock real-time data for demo
+    const now = new Date();
+    const newData = [];
+    
+    for (let i = 23; i >= 0; i--) {
+      const time = new Date(now.getTime() - i * 60000);
+      newData.push({
+        time: time.toLocaleTimeString('en-US', { hour12: false, hour: '2-digit', minute: '2-digit' }),
+        transactions: Math.floor(Math.random() * 50) + 10,
+        blocked: Math.floor(Math.random() * 5),
+        riskScore: Math.random() * 0.3 + 0.1
+      });
+    }
+    
+    setRealtimeData(newData);
+
+    // Risk distribution data
+    setRiskDistribution([
+      { name: 'Low Risk', value: 70, color: '#10B981' },
+      { name: 'Medium Risk', value: 25, color: '#F59E0B' },
+      { name: 'High Risk', value: 5, color: '#EF4444' }
+    ]);
+
+    // Transaction volume by hour
+    const volumeData = [];
+    for (let hour = 0; hour < 24; hour++) {
+      volumeData.push({
+        hour: `${hour.toString().padStart(2, '0')}:00`,
+        volume: Math.floor(Math.random() * 200) + 50
+      });
     }
+    setTransactionVolume(volumeData);
   };
 
   const StatCard = ({ title, value, subtitle, icon, color = 'blue' }) => (
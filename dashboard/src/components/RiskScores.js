@@ -1,27 +1,36 @@
 import React, { useState, useEffect } from 'react';
 import { ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, RadarChart, PolarGrid, PolarAngleAxis, PolarRadiusAxis, Radar, Legend } from 'recharts';
 import axios from 'axios';
+import useLiveFeed, { mergeLatest } from '../useLiveFeed';
 
 const RiskScores = () => {
-  const [riskData, setRiskData] = useState([]);
+  const [demoRiskData, setDemoRiskData] = useState([]);
   const [modelPerformance, setModelPerformance] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [livePredictions, setLivePredictions] = useState([]);
 
   useEffect(() => {
     fetchRiskData();
-    
-    const interval = setInterval(() => {
-      fetchRiskData();
-    }, 15000);
-
-    return () => clearInterval(interval);
   }, []);
 
+  // Scored transactions are pushed by the risk engine; they replace the demo data once they arrive
+  useLiveFeed('http://localhost:8002/stream/predictions', (prediction) => {
+    const riskScore = prediction.risk_scores.fraudulent;
+    setLivePredictions((previous) => mergeLatest(previous, {
+      id: prediction.transaction_id,
+      amount: prediction.transaction.amount,
+      riskScore: Math.round(riskScore * 100) / 100,
+      category: prediction.risk_level === 'HIGH' ? 'High Risk' : prediction.risk_level === 'MEDIUM' ? 'Medium Risk' : 'Low Risk'
+    }, 'id', 100));
+  });
+
+  const riskData = livePredictions.length ? livePredictions : demoRiskData;
+
   const fetchRiskData = async () => {
     try {
       // Generate mock risk analysis data
       const mockRiskData = generateMockRiskData();
-      setRiskData(mockRiskData);
+      setDemoRiskData(mockRiskData);
       
       const mockPerformance = generateModelPerformance();
       setModelPerformance(mockPerformance);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import moment from 'moment';
+import useLiveFeed, { mergeLatest } from '../useLiveFeed';
 
 const TransactionFeed = () => {
   const [transactions, setTransactions] = useState([]);
@@ -9,15 +10,13 @@ const TransactionFeed = () => {
 
   useEffect(() => {
     fetchTransactions();
-    
-    // Auto-refresh every 5 seconds
-    const interval = setInterval(() => {
-      fetchTransactions();
-    }, 5000);
-
-    return () => clearInterval(interval);
   }, []);
 
+  // New transactions are pushed by the ingestion service instead of re-fetched
+  useLiveFeed('http://localhost:8001/stream/transactions', (transaction) => {
+    setTransactions((previous) => mergeLatest(previous, transaction, '_id', 100));
+  });
+
   const fetchTransactions = async () => {
     try {
       const response = await axios.get('http://localhost:8001/transactions/recent?limit=100');
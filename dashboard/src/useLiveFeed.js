@@ -0,0 +1,62 @@
+import { useCallback, useEffect, useRef } from 'react';
+
+// Subscribe to a service's Server-Sent Events feed. EventSource reconnects on its
+// own and sends Last-Event-ID, so the service replays anything missed meanwhile.
+const useLiveFeed = (url, onEvent) => {
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+
+  useEffect(() => {
+    const source = new EventSource(url);
+
+    source.onmessage = (event) => {
+      try {
+        handler.current(JSON.parse(event.data), Number(event.lastEventId));
+      } catch (error) {
+        console.error(`Error handling live event from ${url}:`, error);
+      }
+    };
+
+    return () => source.close();
+  }, [url]);
+};
+
+// Live feed for adding to /stats counters. Each connect replays recent events the counters
+// already include, so events are held until the returned `since` is called with the feed's
+// position from the /stats response; only events after it reach `onEvent`, each once.
+export const useLiveFeedSince = (url, onEvent) => {
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+  const position = useRef(null);
+  const held = useRef([]);
+
+  const deliver = (data, id) => {
+    if (id > position.current) {
+      position.current = id;
+      handler.current(data);
+    }
+  };
+
+  useLiveFeed(url, (data, id) => {
+    if (position.current === null) {
+      held.current.push([data, id]);
+    } else {
+      deliver(data, id);
+    }
+  });
+
+  return useCallback((snapshotPosition) => {
+    position.current = Math.max(position.current || 0, snapshotPosition || 0);
+    const pending = held.current;
+    held.current = [];
+    pending.forEach(([data, id]) => deliver(data, id));
+  }, []);
+};
+
+// Put a live item at the head of a list, replacing any copy already loaded
+export const mergeLatest = (items, item, key, limit) => [
+  item,
+  ...items.filter((existing) => existing[key] !== item[key])
+].slice(0, limit);
+
+export default useLiveFeed;
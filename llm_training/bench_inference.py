@@ -0,0 +1,117 @@
+"""CPU throughput/latency benchmark for the LLM inference path.
+
+Compares the old per-request `pipeline(...)` construction against the
+resident inference worker, unbatched and with dynamic batching at several
+client concurrency levels.
+
+    python llm_training/bench_inference.py --requests 256 --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+
+from inference import BatchedInferenceServer, format_transaction
+
+PROFILES = {
+    'normal': ((5, 500), ['New York', 'Los Angeles', 'Chicago', 'Houston'],
+               ['Amazon', 'Starbucks', 'Target', 'Walmart']),
+    'suspicious': ((500, 2000), ['Miami', 'Las Vegas', 'Atlanta'],
+                   ['Online Casino', 'Luxury Store', 'Cash Advance']),
+    'fraudulent': ((1000, 10000), ['Nigeria', 'Romania', 'Unknown'],
+                   ['Suspicious Merchant', 'Unknown Store', 'Cash Withdrawal'])
+}
+
+
+def synthetic_transactions(n, seed=42):
+    """Transactions shaped like the ingestion service's simulated stream"""
+    rng = random.Random(seed)
+    transactions = []
+
+    for _ in range(n):
+        risk_profile = rng.choice(list(PROFILES))
+        (low, high), locations, merchants = PROFILES[risk_profile]
+        transactions.append({
+            'amount': round(rng.uniform(low, high), 2),
+            'merchant': rng.choice(merchants),
+            'location': rng.choice(locations),
+            'device_info': rng.choice(['iPhone 14', 'Samsung Galaxy', 'Chrome Browser', 'Firefox Browser']),
+            'ip_address': '.'.join(str(rng.randint(1, 255)) for _ in range(4)),
+            'risk_profile': risk_profile
+        })
+
+    return transactions
+
+
+def summarize(name, latencies, elapsed):
+    """Print one result row"""
+    ms = np.array(latencies) * 1000
+    print(f"{name:<32} {len(latencies) / elapsed:>10.1f} {np.percentile(ms, 50):>10.2f} "
+          f"{np.percentile(ms, 99):>10.2f}")
+
+
+def bench_pipeline_per_request(tokenizer, model, texts):
+    """Old behaviour: build a pipeline for every request"""
+    latencies = []
+    start = time.perf_counter()
+
+    for text in texts:
+        t0 = time.perf_counter()
+        classifier = pipeline("text-classification", model=model, tokenizer=tokenizer, top_k=None)
+        classifier(text)
+        latencies.append(time.perf_counter() - t0)
+
+    summarize('pipeline per request', latencies, time.perf_counter() - start)
+
+
+async def bench_server(name, server, texts, concurrency):
+    """Drive the inference server with `concurrency` closed-loop clients"""
+    await server.start()
+    latencies = []
+    pending = list(texts)
+
+    async def client():
+        while pending:
+            text = pending.pop()
+            t0 = time.perf_counter()
+            await server.predict(text)
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    summarize(name, latencies, time.perf_counter() - start)
+    await server.stop()
+
+
+async def main(args):
+    torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model, num_labels=3)
+    texts = [format_transaction(tx) for tx in synthetic_transactions(args.requests)]
+
+    print(f"{'mode':<32} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    bench_pipeline_per_request(tokenizer, model, texts[:args.baseline_requests])
+
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        unbatched = BatchedInferenceServer(tokenizer, model, max_batch_size=1, max_wait_ms=0)
+        await bench_server(f"resident, unbatched, c={concurrency}", unbatched, texts, concurrency)
+
+        batched = BatchedInferenceServer(tokenizer, model, max_batch_size=args.max_batch_size,
+                                         max_wait_ms=args.max_wait_ms)
+        await bench_server(f"resident, batched, c={concurrency}", batched, texts, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='distilbert-base-uncased')
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--baseline-requests', type=int, default=32)
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=torch.get_num_threads())
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""Accuracy, latency and memory report for int8 vs fp32 LLM inference.
+
+Scores the same synthetic labelled transactions with the fp32 model padded
+to 512 tokens (the old tokenizer settings), fp32 with length-bucketed
+padding, and the dynamically quantized int8 model with bucketed padding.
+
+    python llm_training/bench_quantization.py --model ./fraud_model --samples 512
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from bench_inference import synthetic_transactions
+from inference import LABELS, BatchedInferenceServer, format_transaction
+
+
+class FullPaddingServer(BatchedInferenceServer):
+    """Old tokenizer settings: every batch padded out to 512 tokens"""
+
+    def score_batch(self, texts):
+        inputs = self.tokenizer(texts, truncation=True, padding='max_length', max_length=512,
+                                return_tensors='pt')
+        with torch.inference_mode():
+            probabilities = torch.softmax(self.model(**inputs).logits, dim=-1).tolist()
+        return [dict(zip(LABELS, row)) for row in probabilities]
+
+
+def model_size_mb(model):
+    """Serialized state_dict size"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+
+def score_all(server, texts, batch_size):
+    """Probabilities for every text plus per-batch latencies"""
+    probabilities, latencies = [], []
+
+    for i in range(0, len(texts), batch_size):
+        t0 = time.perf_counter()
+        results = server.score_batch(texts[i:i + batch_size])
+        latencies.append(time.perf_counter() - t0)
+        probabilities.extend([result[label] for label in LABELS] for result in results)
+
+    return np.array(probabilities), np.array(latencies) * 1000
+
+
+def main(args):
+    torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model, num_labels=3)
+
+    transactions = synthetic_transactions(args.samples)
+    texts = [format_transaction(tx) for tx in transactions]
+    labels = np.array([LABELS.index(tx['risk_profile']) for tx in transactions])
+
+    fp32_size = model_size_mb(model)
+    modes = {
+        'fp32, pad 512': FullPaddingServer(tokenizer, model),
+        'fp32, bucketed': BatchedInferenceServer(tokenizer, model),
+        'int8, bucketed': BatchedInferenceServer(tokenizer, model, quantize=True)
+    }
+
+    results = {}
+    for name, server in modes.items():
+        probabilities, _ = score_all(server, texts, 32)
+        _, single = score_all(server, texts[:args.latency_samples], 1)
+        _, batched = score_all(server, texts, 32)
+        results[name] = (probabilities, single, batched)
+
+    reference = results['fp32, bucketed'][0]
+    print(f"{'mode':<16} {'acc':>7} {'agree':>7} {'max|dp|':>8} {'p50 b=1':>9} "
+          f"{'p99 b=1':>9} {'p50 b=32':>9} {'size MB':>8}")
+
+    for name, (probabilities, single, batched) in results.items():
+        predictions = probabilities.argmax(axis=1)
+        size = model_size_mb(modes[name].model) if name.startswith('int8') else fp32_size
+        print(f"{name:<16} {(predictions == labels).mean():>7.3f} "
+              f"{(predictions == reference.argmax(axis=1)).mean():>7.3f} "
+              f"{np.abs(probabilities - reference).max():>8.4f} "
+              f"{np.percentile(single, 50):>9.2f} {np.percentile(single, 99):>9.2f} "
+              f"{np.percentile(batched, 50):>9.2f} {size:>8.1f}")
+
+    fp32_acc = (reference.argmax(axis=1) == labels).mean()
+    int8_acc = (results['int8, bucketed'][0].argmax(axis=1) == labels).mean()
+    print(f"\naccuracy delta (int8 - fp32): {int8_acc - fp32_acc:+.4f}")
+    print(f"max padded length: {modes['fp32, bucketed'].max_length} tokens (was 512)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='distilbert-base-uncased')
+    parser.add_argument('--samples', type=int, default=512)
+    parser.add_argument('--latency-samples', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=torch.get_num_threads())
+    main(parser.parse_args())
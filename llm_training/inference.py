@@ -0,0 +1,164 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LABELS = ['normal', 'suspicious', 'fraudulent']
+
+# Padded lengths are rounded up to a multiple of this, so batches only ever
+# take a handful of shapes
+PAD_BUCKET = 16
+
+# Worst-case field values for sizing the token budget of the template
+LONGEST_TRANSACTION = {
+    'amount': 99999.99,
+    'merchant': 'Suspicious Merchant',
+    'location': 'Los Angeles',
+    'device_info': 'Samsung Galaxy',
+    'ip_address': '255.255.255.255'
+}
+
+
+def format_transaction(transaction):
+    """Text template the classifier is trained and served on"""
+    return f"Transaction: ${transaction['amount']} at {transaction['merchant']} " \
+           f"in {transaction['location']} using {transaction['device_info']} " \
+           f"from IP {transaction['ip_address']}"
+
+
+def template_max_length(tokenizer):
+    """Token budget for the transaction template, rounded up to a pad bucket"""
+    length = len(tokenizer(format_transaction(LONGEST_TRANSACTION))['input_ids'])
+    return -(-length // PAD_BUCKET) * PAD_BUCKET + PAD_BUCKET
+
+
+def quantize_model(model):
+    """Dynamically quantized int8 copy of a model's Linear layers for CPU inference"""
+    import torch
+    
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class BatchedInferenceServer:
+    """Long-lived inference worker with dynamic micro-batching.
+
+    Keeps the tokenizer and model resident and gathers concurrent requests
+    from an asyncio queue into batches bounded by `max_batch_size` and
+    `max_wait_ms`. Forward passes run on a dedicated thread so the event loop
+    keeps accepting requests while a batch is being scored.
+
+    With `quantize=True` the served model is an int8 dynamically quantized
+    copy. Batches are padded to the next `PAD_BUCKET` multiple of their
+    longest text, capped at `max_length` (defaults to the template's size).
+    """
+
+    def __init__(self, tokenizer, model, max_batch_size=32, max_wait_ms=5,
+                 max_length=None, quantize=False):
+        self.tokenizer = tokenizer
+        self.quantize = quantize
+        self.model = None
+        self.set_model(model)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_length = max_length or template_max_length(tokenizer)
+        self.queue = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='llm-inference')
+        self._worker_task = None
+        self.stats = {'requests': 0, 'batches': 0, 'batch_size_total': 0, 'inference_ms_total': 0.0}
+
+    def set_model(self, model):
+        """Prepare `model` for serving and make it the one new batches use"""
+        model.eval()
+        self.model = quantize_model(model) if self.quantize else model
+
+    async def start(self):
+        """Start the batching worker on the running event loop"""
+        if self._worker_task is None:
+            self.queue = asyncio.Queue()
+            self._worker_task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        """Stop the batching worker"""
+        if self._worker_task:
+            self._worker_task.cancel()
+            self._worker_task = None
+
+    async def predict(self, text):
+        """Score one text; waits for the batch it joins"""
+        if self._worker_task is None:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def predict_many(self, texts):
+        """Score several texts; they are queued together and batched as usual"""
+        return await asyncio.gather(*(self.predict(text) for text in texts))
+
+    async def _worker(self):
+        """Collect queued requests into batches and score them"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.score_batch, texts)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def score_batch(self, texts):
+        """Run one forward pass over a batch of texts"""
+        import torch
+        
+        start = time.perf_counter()
+        tokenizer, model = self.tokenizer, self.model
+
+        with torch.inference_mode():
+            encoded = tokenizer(texts, truncation=True, max_length=self.max_length)
+            longest = max(len(ids) for ids in encoded['input_ids'])
+            inputs = tokenizer.pad(
+                encoded,
+                padding='max_length',
+                max_length=min(-(-longest // PAD_BUCKET) * PAD_BUCKET, self.max_length),
+                return_tensors='pt'
+            )
+            probabilities = torch.softmax(model(**inputs).logits, dim=-1).tolist()
+
+        self.stats['requests'] += len(texts)
+        self.stats['batches'] += 1
+        self.stats['batch_size_total'] += len(texts)
+        self.stats['inference_ms_total'] += (time.perf_counter() - start) * 1000
+        return [dict(zip(LABELS, row)) for row in probabilities]
+
+    def get_stats(self):
+        """Batching statistics since startup"""
+        batches = self.stats['batches'] or 1
+        return {
+            'requests': self.stats['requests'],
+            'batches': self.stats['batches'],
+            'avg_batch_size': self.stats['batch_size_total'] / batches,
+            'avg_batch_ms': self.stats['inference_ms_total'] / batches,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_length': self.max_length,
+            'quantized': self.quantize,
+            'queue_depth': self.queue.qsize() if self.queue else 0
+        }
@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+
+from inference import format_transaction
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import find_shape
+
+LABEL_IDS = {'normal': 0, 'suspicious': 1, 'fraudulent': 2}
+
+
+class ReplayBuffer:
+    """Persistent, append-only buffer of tokenized training examples.
+
+    Token ids, lengths and labels live in flat binary files that are appended
+    to and read back through `np.memmap`, so every cycle only tokenizes the
+    transactions inserted since the last one and old fraud patterns stay
+    available for replay. `meta.json` is replaced atomically after each
+    append and is the source of truth for how many rows are complete.
+    """
+
+    def __init__(self, directory, seq_len, pad_token_id, vocab_size):
+        self.directory = directory
+        self.seq_len = seq_len
+        self.pad_token_id = pad_token_id
+        self.vocab_size = vocab_size
+        os.makedirs(directory, exist_ok=True)
+        self.meta = self._load_meta()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load_meta(self):
+        """Read buffer metadata, resetting the buffer if the layout changed"""
+        fresh = {'count': 0, 'last_id': None, 'seq_len': self.seq_len, 'vocab_size': self.vocab_size}
+
+        try:
+            with open(self._path('meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+        if not meta or meta['seq_len'] != self.seq_len or meta['vocab_size'] != self.vocab_size:
+            for name in ('input_ids.bin', 'lengths.bin', 'labels.bin'):
+                open(self._path(name), 'wb').close()
+            return fresh
+
+        # Drop rows from an append that crashed before its metadata was written
+        sizes = {'input_ids.bin': 4 * self.seq_len, 'lengths.bin': 2, 'labels.bin': 1}
+        for name, row_bytes in sizes.items():
+            with open(self._path(name), 'ab') as f:
+                f.truncate(meta['count'] * row_bytes)
+
+        return meta
+
+    def _save_meta(self):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def __len__(self):
+        return self.meta['count']
+
+    def append(self, transactions, tokenizer):
+        """Tokenize transactions once and append them to the buffer"""
+        if not transactions:
+            return 0
+
+        encoded = tokenizer(
+            [format_transaction(tx) for tx in transactions],
+            truncation=True,
+            max_length=self.seq_len
+        )['input_ids']
+
+        input_ids = np.full((len(encoded), self.seq_len), self.pad_token_id, dtype=np.int32)
+        lengths = np.empty(len(encoded), dtype=np.int16)
+        for row, ids in enumerate(encoded):
+            input_ids[row, :len(ids)] = ids
+            lengths[row] = len(ids)
+
+        labels = np.array(
+            [LABEL_IDS.get(tx.get('risk_profile', 'normal'), 0) for tx in transactions],
+            dtype=np.int8
+        )
+
+        for name, array in (('input_ids.bin', input_ids), ('lengths.bin', lengths), ('labels.bin', labels)):
+            with open(self._path(name), 'ab') as f:
+                f.write(array.tobytes())
+
+        self.meta['count'] += len(transactions)
+        if '_id' in transactions[-1]:
+            self.meta['last_id'] = str(transactions[-1]['_id'])
+        self._save_meta()
+        return len(transactions)
+
+    def append_new_from_mongo(self, collection, tokenizer, max_new=10000):
+        """Append only the transactions inserted since the last call.
+
+        An empty buffer is seeded with the newest `max_new` transactions, so
+        the first cycles train on current traffic rather than the oldest.
+        """
+        if not self.meta['last_id']:
+            transactions = list(find_shape(collection, 'llm: replay buffer seed', max_new))
+            return self.append(transactions[::-1], tokenizer)
+
+        transactions = list(find_shape(collection, 'llm: replay buffer catch-up', max_new, last_id=self.meta['last_id']))
+        return self.append(transactions, tokenizer)
+
+    def _columns(self):
+        """Memory-mapped views over the complete rows"""
+        count = self.meta['count']
+        return (
+            np.memmap(self._path('input_ids.bin'), dtype=np.int32, mode='r', shape=(count, self.seq_len)),
+            np.memmap(self._path('lengths.bin'), dtype=np.int16, mode='r', shape=(count,)),
+            np.memmap(self._path('labels.bin'), dtype=np.int8, mode='r', shape=(count,))
+        )
+
+    def sample(self, size, seed=None):
+        """Class-balanced sample of row indices (with replacement for rare classes)"""
+        rng = np.random.default_rng(seed)
+        _, _, labels = self._columns()
+
+        classes = [np.flatnonzero(labels == label) for label in LABEL_IDS.values()]
+        classes = [rows for rows in classes if len(rows)]
+        per_class = max(1, size // len(classes))
+
+        indices = np.concatenate([
+            rng.choice(rows, per_class, replace=len(rows) < per_class) for rows in classes
+        ])
+        rng.shuffle(indices)
+        return indices
+
+    def dataset(self, size, seed=None):
+        """Torch dataset over a class-balanced sample, ready for `Trainer`"""
+        return ReplayDataset(self, self.sample(size, seed))
+
+    def class_counts(self):
+        """Number of stored examples per label"""
+        _, _, labels = self._columns()
+        counts = np.bincount(labels, minlength=len(LABEL_IDS))
+        return {name: int(counts[label]) for name, label in LABEL_IDS.items()}
+
+
+class ReplayDataset(torch.utils.data.Dataset):
+    """Sampled rows of a replay buffer, read lazily from the memory maps"""
+
+    def __init__(self, buffer, indices):
+        self.input_ids, self.lengths, self.labels = buffer._columns()
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        row = self.indices[i]
+        input_ids = torch.from_numpy(np.array(self.input_ids[row], dtype=np.int64))
+        attention_mask = (torch.arange(len(input_ids)) < int(self.lengths[row])).long()
+        return {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'labels': torch.tensor(int(self.labels[row]))
+        }
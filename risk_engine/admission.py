@@ -0,0 +1,160 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections import deque
+
+import numpy as np
+
+# Priority classes in the order they are served
+PRIORITIES = ['high', 'normal']
+
+
+class AdmissionController:
+    """Bounded in-flight scoring with priority classes and queue-time shedding.
+
+    At most `max_in_flight` requests score at once. The rest wait in a
+    priority queue, `high` before `normal` and oldest first within a class,
+    and a finishing request hands its slot straight to the next waiter. A
+    waiter is shed once it has queued longer than its class's budget in
+    `max_queue_ms`, and when `max_queue` requests are already waiting the
+    newest lowest-priority one is shed to make room (or the arrival itself,
+    if nothing queued ranks below it). Shed callers get the reason back
+    instead of a slot, so they can answer with a cheaper score rather than
+    time out. The cheaper scores are bounded too: at most `max_degraded`
+    run at once, and past that a shed caller gets no slot at all and must
+    answer without scoring. Runs on one event loop; not thread-safe.
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=64, max_queue_ms=None, max_degraded=16):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_ms = max_queue_ms or {'high': 500, 'normal': 100}
+        self.max_degraded = max_degraded
+        self.in_flight = 0
+        self.queued = 0
+        self.degraded_in_flight = 0
+        self.unscored = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self.stats = {
+            priority: {'admitted': 0, 'shed_queue_full': 0, 'shed_queue_timeout': 0}
+            for priority in PRIORITIES
+        }
+        self._waits = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+
+    def _admit(self, priority, waited):
+        self.stats[priority]['admitted'] += 1
+        self._waits[priority].append(waited)
+
+    def _shed(self, entry, reason):
+        """Drop a queued waiter; it stays in the heap and is skipped when popped"""
+        rank, _, future, _, handle = entry
+        if handle:
+            handle.cancel()
+        if not future.done():
+            future.set_result(reason)
+            self.queued -= 1
+            self.stats[PRIORITIES[rank]][f"shed_{reason}"] += 1
+
+    async def acquire(self, priority):
+        """Wait for a scoring slot: returns None once admitted, or the reason the request was shed"""
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self._admit(priority, 0.0)
+            return None
+
+        rank = PRIORITIES.index(priority)
+        if self.queued >= self.max_queue:
+            live = [entry for entry in self._waiters if not entry[2].done()]
+            worst = max(live, key=lambda entry: (entry[0], entry[1]))
+            if worst[0] <= rank:
+                self.stats[priority]['shed_queue_full'] += 1
+                return 'queue_full'
+            self._shed(worst, 'queue_full')
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = [rank, next(self._seq), future, time.monotonic(), None]
+        entry[4] = loop.call_later(self.max_queue_ms[priority] / 1000, self._shed, entry, 'queue_timeout')
+        heapq.heappush(self._waiters, entry)
+        self.queued += 1
+
+        # Skipped entries are only dropped when popped; rebuild before they pile up
+        if len(self._waiters) > 2 * self.max_queue + 16:
+            self._waiters = [e for e in self._waiters if not e[2].done()]
+            heapq.heapify(self._waiters)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # The caller went away while still queued
+                entry[4].cancel()
+                self.queued -= 1
+            elif future.result() is None:
+                self.release()
+            raise
+
+    def release(self):
+        """Hand the slot to the best waiter, or free it"""
+        while self._waiters:
+            rank, _, future, enqueued, handle = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            handle.cancel()
+            self.queued -= 1
+            self._admit(PRIORITIES[rank], time.monotonic() - enqueued)
+            future.set_result(None)
+            return
+        self.in_flight -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority):
+        """`async with admission.slot(priority) as shed:` scores when `shed` is None"""
+        shed = await self.acquire(priority)
+        try:
+            yield shed
+        finally:
+            if shed is None:
+                self.release()
+
+    @contextlib.contextmanager
+    def degraded_slot(self):
+        """`with admission.degraded_slot() as admitted:` runs the cheap score when `admitted`, never waits"""
+        if self.degraded_in_flight >= self.max_degraded:
+            self.unscored += 1
+            yield False
+            return
+
+        self.degraded_in_flight += 1
+        try:
+            yield True
+        finally:
+            self.degraded_in_flight -= 1
+
+    def get_stats(self):
+        classes = {}
+        for priority in PRIORITIES:
+            waits = np.array(self._waits[priority]) * 1000
+            counts = self.stats[priority]
+            shed = counts['shed_queue_full'] + counts['shed_queue_timeout']
+            total = counts['admitted'] + shed
+            classes[priority] = {
+                **counts,
+                'shed_rate': shed / total if total else 0.0,
+                'queue_wait_p50_ms': float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                'queue_wait_p99_ms': float(np.percentile(waits, 99)) if len(waits) else 0.0,
+                'max_queue_ms': self.max_queue_ms[priority]
+            }
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'degraded_in_flight': self.degraded_in_flight,
+            'max_degraded': self.max_degraded,
+            'unscored': self.unscored,
+            'classes': classes
+        }
@@ -0,0 +1,223 @@
+"""Streaming half-space trees versus the periodically refit IsolationForest.
+
+Generates a synthetic transaction stream whose normal behaviour drifts part
+way through (larger amounts, new merchants, later hours) while a new attack
+pattern replaces the old one, and runs it through the model's feature
+extraction. Every detector scores each transaction before it sees it
+(prequential): an IsolationForest fit once, one refit on the latest rows
+every `--refit-every` transactions as train_ml.py does every 5 minutes, and
+HalfSpaceTrees learning from every transaction. Per phase it reports
+detection rate, false positive rate and ROC AUC; it also times a single
+update and score, batch scoring, and an IsolationForest refit.
+
+    python bench_anomaly.py --baseline 4000 --drifted 8000 --refit-every 3000 --report anomaly_report.json
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.metrics import roc_auc_score
+
+from halfspace import HalfSpaceTrees
+from model import FraudDetectionModel
+
+TRAIN_ROWS = 1000
+MERCHANTS = [f"Store {i}" for i in range(15)]
+NEW_MERCHANTS = [f"Partner {i}" for i in range(15)]
+LOCATIONS = ['New York', 'Chicago', 'Boston', 'Seattle', 'Austin', 'Denver', 'Miami', 'Atlanta']
+DEVICES = ['iPhone 14', 'Samsung Galaxy', 'Chrome Browser', 'Safari Browser']
+
+
+def generate(rng, count, drifted, anomaly_rate):
+    """Transactions and anomaly labels; after the drift both normal behaviour and the attack change"""
+    start = datetime(2024, 5, 1)
+    transactions = []
+    labels = rng.random(count) < anomaly_rate
+    for anomalous in labels:
+        day = start + timedelta(days=int(rng.integers(28)))
+        tx = {
+            'location': str(rng.choice(LOCATIONS)),
+            'device_info': str(rng.choice(DEVICES)),
+            'ip_address': '.'.join(str(rng.integers(1, 256)) for _ in range(4))
+        }
+        if anomalous and not drifted:
+            # Account takeover: very large amounts at night from an unfamiliar device
+            tx.update(amount=rng.lognormal(np.log(3000), 0.5), merchant=str(rng.choice(MERCHANTS)),
+                      hour=rng.integers(1, 5), device_info='Unknown Android')
+        elif anomalous:
+            # Card testing: tiny amounts in the early morning from a headless browser over IPv6
+            tx.update(amount=rng.uniform(1, 5), merchant=str(rng.choice(NEW_MERCHANTS)),
+                      hour=rng.integers(2, 6), device_info='Headless Chrome',
+                      ip_address=':'.join(f"{rng.integers(65536):04x}" for _ in range(8)))
+        elif not drifted:
+            tx.update(amount=rng.lognormal(np.log(60), 0.6), merchant=str(rng.choice(MERCHANTS)),
+                      hour=np.clip(rng.normal(14, 3), 6, 23))
+        else:
+            # Legitimate drift: a new merchant partnership with bigger baskets, shopped in the evening
+            tx.update(amount=rng.lognormal(np.log(180), 0.6), merchant=str(rng.choice(NEW_MERCHANTS)),
+                      hour=np.clip(rng.normal(19, 2), 6, 23))
+        tx['timestamp'] = (day + timedelta(hours=float(tx.pop('hour')))).isoformat()
+        tx['amount'] = round(float(tx['amount']), 2)
+        transactions.append(tx)
+    return transactions, labels
+
+
+def run_isolation_forest(X, refit_every):
+    """Normality scores (higher is normal) and flags, refitting on the latest rows every `refit_every`"""
+    scores = np.empty(len(X) - TRAIN_ROWS)
+    flags = np.empty(len(X) - TRAIN_ROWS, dtype=bool)
+    forest = IsolationForest(contamination=0.1, random_state=42).fit(X[:TRAIN_ROWS])
+    step = refit_every or len(X)
+    for start in range(TRAIN_ROWS, len(X), step):
+        chunk = X[start:start + step]
+        scores[start - TRAIN_ROWS:start - TRAIN_ROWS + len(chunk)] = forest.decision_function(chunk)
+        flags[start - TRAIN_ROWS:start - TRAIN_ROWS + len(chunk)] = forest.predict(chunk) == -1
+        if refit_every and start + step < len(X):
+            forest = IsolationForest(contamination=0.1, random_state=42).fit(X[start + step - TRAIN_ROWS:start + step])
+    return scores, flags
+
+
+def run_half_space_trees(X, **params):
+    """Prequential scores and flags: each window is scored against the reference, then learned"""
+    detector = HalfSpaceTrees(random_state=42, **params).fit(X[:TRAIN_ROWS])
+    scores, flags = [], []
+    position = TRAIN_ROWS
+    while position < len(X):
+        # The reference only changes when a window rolls over, so score up to that point in one call
+        chunk = X[position:position + detector.window_size - detector._filled]
+        chunk_scores = detector.score(chunk)
+        scores.append(chunk_scores)
+        flags.append(chunk_scores < detector.threshold)
+        detector.learn(chunk)
+        position += len(chunk)
+    return np.concatenate(scores), np.concatenate(flags), detector
+
+
+def evaluate(scores, flags, labels):
+    normal = ~labels
+    return {
+        'rows': int(len(labels)),
+        'anomalies': int(labels.sum()),
+        'detection_rate': float(flags[labels].mean()) if labels.any() else None,
+        'false_positive_rate': float(flags[normal].mean()) if normal.any() else None,
+        'precision': float(labels[flags].mean()) if flags.any() else None,
+        'roc_auc': float(roc_auc_score(labels, -scores)) if labels.any() and normal.any() else None
+    }
+
+
+def time_costs(X, repeats):
+    """Microseconds per transaction for single updates and scores, and milliseconds per refit"""
+    rows = X[TRAIN_ROWS:TRAIN_ROWS + repeats]
+    detector = HalfSpaceTrees(random_state=42).fit(X[:TRAIN_ROWS])
+    forest = IsolationForest(contamination=0.1, random_state=42)
+
+    def per_row(fn, items):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        return (time.perf_counter() - started) / len(items) * 1e6
+
+    started = time.perf_counter()
+    forest.fit(X[:TRAIN_ROWS])
+    refit_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    HalfSpaceTrees(random_state=42).fit(X[:TRAIN_ROWS])
+    hst_fit_ms = (time.perf_counter() - started) * 1000
+
+    batch = X[:TRAIN_ROWS]
+    started = time.perf_counter()
+    detector.score(batch)
+    hst_batch_us = (time.perf_counter() - started) / len(batch) * 1e6
+    started = time.perf_counter()
+    forest.predict(batch)
+    forest_batch_us = (time.perf_counter() - started) / len(batch) * 1e6
+
+    return {
+        'half_space_trees': {
+            'update_us': per_row(detector.learn, rows),
+            'score_us': per_row(detector.score, rows),
+            'batch_score_us_per_row': hst_batch_us,
+            'fit_ms': hst_fit_ms
+        },
+        'isolation_forest': {
+            'update_us': None,
+            'score_us': per_row(lambda row: forest.predict(row[None]), rows[:max(1, repeats // 10)]),
+            'batch_score_us_per_row': forest_batch_us,
+            'fit_ms': refit_ms
+        }
+    }
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    before, before_labels = generate(rng, args.baseline, False, args.anomaly_rate)
+    after, after_labels = generate(rng, args.drifted, True, args.anomaly_rate)
+    # Every detector starts from a fit on the first TRAIN_ROWS transactions, anomalies included
+    X = FraudDetectionModel().extract_features(before + after).astype(float)
+    labels = np.concatenate([before_labels, after_labels])
+    drift_at = args.baseline - TRAIN_ROWS
+
+    runs = {}
+    scores, flags = run_isolation_forest(X, 0)
+    runs['isolation_forest (fit once)'] = (scores, flags)
+    scores, flags = run_isolation_forest(X, args.refit_every)
+    runs[f"isolation_forest (refit every {args.refit_every})"] = (scores, flags)
+    scores, flags, detector = run_half_space_trees(X, n_trees=args.trees, depth=args.depth, window_size=args.window)
+    runs['half_space_trees'] = (scores, flags)
+
+    labels = labels[TRAIN_ROWS:]
+    phases = {
+        'baseline': slice(0, drift_at),
+        'drift_onset': slice(drift_at, drift_at + args.onset),
+        'drifted': slice(drift_at + args.onset, len(labels))
+    }
+    report = {
+        'rows': {'baseline': args.baseline, 'drifted': args.drifted, 'anomaly_rate': args.anomaly_rate},
+        'detectors': {
+            name: {phase: evaluate(scores[rows], flags[rows], labels[rows]) for phase, rows in phases.items()}
+            for name, (scores, flags) in runs.items()
+        },
+        'half_space_trees': detector.get_stats(),
+        'cost': time_costs(X, args.timing_rows)
+    }
+
+    def pct(value):
+        return f"{value * 100:.1f}%" if value is not None else '-'
+
+    print(f"{'detector':<38} {'phase':<12} {'detected':>9} {'false pos':>10} {'precision':>10} {'auc':>6}")
+    for name, phases_report in report['detectors'].items():
+        for phase, result in phases_report.items():
+            auc = f"{result['roc_auc']:.3f}" if result['roc_auc'] is not None else '-'
+            print(f"{name:<38} {phase:<12} {pct(result['detection_rate']):>9} "
+                  f"{pct(result['false_positive_rate']):>10} {pct(result['precision']):>10} {auc:>6}")
+
+    print(f"\n{'detector':<18} {'update us':>10} {'score us':>10} {'batch us/row':>13} {'fit ms':>8}")
+    for name, cost in report['cost'].items():
+        update = f"{cost['update_us']:.1f}" if cost['update_us'] is not None else 'refit'
+        print(f"{name:<18} {update:>10} {cost['score_us']:>10.1f} {cost['batch_score_us_per_row']:>13.1f} "
+              f"{cost['fit_ms']:>8.1f}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', type=int, default=4000, help="transactions before the drift")
+    parser.add_argument('--drifted', type=int, default=8000, help="transactions after the drift")
+    parser.add_argument('--onset', type=int, default=1000, help="transactions after the drift reported separately")
+    parser.add_argument('--anomaly-rate', type=float, default=0.02)
+    parser.add_argument('--refit-every', type=int, default=3000,
+                        help="transactions between IsolationForest refits (5 minutes at 10 tx/s)")
+    parser.add_argument('--trees', type=int, default=25)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--window', type=int, default=250)
+    parser.add_argument('--timing-rows', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--report')
+    main(parser.parse_args())
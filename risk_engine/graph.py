@@ -0,0 +1,138 @@
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Client-supplied timestamps further ahead of this clock are clamped, so one bad date can't evict the window
+MAX_CLOCK_SKEW_SECONDS = 300
+
+
+def transaction_time(transaction):
+    """Epoch seconds of a transaction's timestamp, or now if it has none"""
+    try:
+        return datetime.fromisoformat(transaction['timestamp'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return time.time()
+
+
+class SlidingWindowGraph:
+    """User/merchant/location graph over a sliding time window.
+
+    Edge weights accumulate with exponential decay (`half_life_seconds`), so a
+    relationship seen once a week ago counts for far less than one seen
+    repeatedly in the last hour. Edges not seen for `window_seconds` are
+    evicted, oldest first, on every `observe` (relative to the newest event
+    seen, so replaying history works), together with any node left without
+    edges; `max_edges` caps memory if traffic outpaces the window. Events
+    should arrive roughly in time order; late ones still add decayed weight.
+    The underlying `networkx.Graph` is exposed as `graph` for the degree
+    features.
+    """
+
+    def __init__(self, window_seconds=86400, half_life_seconds=3600, max_edges=200000):
+        self.window_seconds = window_seconds
+        self.half_life_seconds = half_life_seconds
+        self.max_edges = max_edges
+        # Edges in least-recently-seen order, so eviction only looks at the front
+        self._recency = OrderedDict()
+        self.latest = 0.0
+        self.evicted_edges = 0
+
+    def __getattr__(self, name):
+        # The graph is created on first use, so networkx isn't imported until there is an edge to hold
+        if name != 'graph':
+            raise AttributeError(name)
+        import networkx as nx
+        self.graph = nx.Graph()
+        return self.graph
+
+    def _decay(self, elapsed):
+        return math.pow(0.5, max(elapsed, 0) / self.half_life_seconds)
+
+    def _key(self, u, v):
+        return (u, v) if str(u) <= str(v) else (v, u)
+
+    def add_edge(self, u, v, weight, timestamp, u_type, v_type):
+        """Accumulate decayed weight on an edge and mark it as just seen"""
+        self.graph.add_node(u, type=u_type)
+        self.graph.add_node(v, type=v_type)
+
+        key = self._key(u, v)
+        if self.graph.has_edge(u, v):
+            data = self.graph[u][v]
+            data['count'] += 1
+            if timestamp < data['last_seen']:
+                # A late event adds its weight as it stands at the edge's last update
+                data['weight'] += weight * self._decay(data['last_seen'] - timestamp)
+                return
+            data['weight'] = data['weight'] * self._decay(timestamp - data['last_seen']) + weight
+            data['last_seen'] = timestamp
+        else:
+            self.graph.add_edge(u, v, weight=weight, last_seen=timestamp, count=1)
+
+        self._recency[key] = timestamp
+        self._recency.move_to_end(key)
+        self.latest = max(self.latest, timestamp)
+
+    def observe(self, transaction, timestamp=None):
+        """Add one transaction's relationships and evict what has aged out"""
+        timestamp = timestamp if timestamp is not None else transaction_time(transaction)
+        timestamp = min(timestamp, time.time() + MAX_CLOCK_SKEW_SECONDS)
+        user_id = transaction.get('user_id', '')
+        merchant = transaction.get('merchant', '')
+        location = transaction.get('location', '')
+
+        self.add_edge(user_id, merchant, transaction.get('amount', 0), timestamp, 'user', 'merchant')
+        self.add_edge(user_id, location, 1, timestamp, 'user', 'location')
+        self.add_edge(merchant, location, 1, timestamp, 'merchant', 'location')
+
+        self.evict()
+
+    def evict(self, now=None):
+        """Drop edges older than the window (and beyond `max_edges`) plus orphaned nodes"""
+        cutoff = (now if now is not None else self.latest) - self.window_seconds
+
+        while self._recency:
+            (u, v), last_seen = next(iter(self._recency.items()))
+            if last_seen >= cutoff and len(self._recency) <= self.max_edges:
+                break
+
+            del self._recency[(u, v)]
+            self.graph.remove_edge(u, v)
+            self.evicted_edges += 1
+            for node in (u, v):
+                if self.graph.degree(node) == 0:
+                    self.graph.remove_node(node)
+
+    def edge_weight(self, u, v, now=None):
+        """Edge weight decayed to `now`"""
+        if not self.graph.has_edge(u, v):
+            return 0.0
+        data = self.graph[u][v]
+        return data['weight'] * self._decay((now or time.time()) - data['last_seen'])
+
+    def weighted_degree(self, node, now=None):
+        """Sum of a node's decayed edge weights"""
+        if node not in self.graph:
+            return 0.0
+        return sum(self.edge_weight(node, neighbour, now) for neighbour in self.graph[node])
+
+    @classmethod
+    def from_graph(cls, graph, timestamp=None, **kwargs):
+        """Adopt a plain graph from an older model file; its edges age out from `timestamp`"""
+        window = cls(**kwargs)
+        timestamp = timestamp or time.time()
+        for u, v, data in graph.edges(data=True):
+            window.add_edge(u, v, data.get('weight', 1), timestamp,
+                            graph.nodes[u].get('type'), graph.nodes[v].get('type'))
+        return window
+
+    def get_stats(self):
+        return {
+            'nodes': self.graph.number_of_nodes(),
+            'edges': self.graph.number_of_edges(),
+            'evicted_edges': self.evicted_edges,
+            'window_seconds': self.window_seconds,
+            'half_life_seconds': self.half_life_seconds,
+            'max_edges': self.max_edges
+        }
@@ -0,0 +1,144 @@
+import numpy as np
+
+
+class HalfSpaceTrees:
+    """Streaming anomaly detector: an ensemble of random half-space trees.
+
+    Every tree halves the feature space `depth` times, each split on a random
+    feature at the midpoint of that node's range, so the trees are fixed up
+    front and never rebuilt. A node counts the points that reached it in the
+    current window (`latest`); after every `window_size` points those counts
+    become the `reference` mass the next window is scored against. Learning
+    or scoring a point walks one root-to-leaf path per tree, so both cost
+    O(depth) regardless of how much has been seen, and the model keeps
+    tracking what normal looks like as it drifts.
+
+    A point's score is the reference mass of the deepest node on its path
+    with more than `size_limit` mass, times 2^node depth, summed over trees:
+    points in sparse regions score low. Points scoring under `threshold`,
+    the `contamination` quantile of the last completed window's own scores,
+    are anomalies. Features can be on any scale; the workspace comes from
+    the ranges seen by `fit`.
+    """
+
+    def __init__(self, n_trees=25, depth=10, window_size=250, contamination=0.1, random_state=None):
+        self.n_trees = n_trees
+        self.depth = depth
+        self.window_size = window_size
+        self.size_limit = 0.1 * window_size
+        self.contamination = contamination
+        self.random_state = random_state
+        self.n_features = None
+        self.threshold = None
+        self.seen = 0
+        self.windows = 0
+
+    def _build(self, mins, maxs):
+        """Random split features and midpoints for every internal node of every tree"""
+        rng = np.random.default_rng(self.random_state)
+        n_internal = 2 ** self.depth - 1
+        n_nodes = 2 ** (self.depth + 1) - 1
+        self.split_features = np.empty((self.n_trees, n_internal), dtype=np.int64)
+        self.split_values = np.empty((self.n_trees, n_internal))
+
+        for tree in range(self.n_trees):
+            # Each tree gets a randomly placed workspace that still covers the whole range
+            anchor = rng.uniform(mins, maxs)
+            extent = 2 * np.maximum(anchor - mins, maxs - anchor)
+            extent[extent == 0] = 1.0
+            lower = np.empty((n_nodes, len(mins)))
+            upper = np.empty((n_nodes, len(mins)))
+            lower[0], upper[0] = anchor - extent, anchor + extent
+
+            for node in range(n_internal):
+                feature = rng.integers(len(mins))
+                middle = (lower[node, feature] + upper[node, feature]) / 2
+                self.split_features[tree, node] = feature
+                self.split_values[tree, node] = middle
+                for child in (2 * node + 1, 2 * node + 2):
+                    lower[child], upper[child] = lower[node], upper[node]
+                upper[2 * node + 1, feature] = middle
+                lower[2 * node + 2, feature] = middle
+
+        self.reference = np.zeros((self.n_trees, n_nodes))
+        self.latest = np.zeros((self.n_trees, n_nodes))
+        self._trees = np.arange(self.n_trees)
+        self._window = np.empty((self.window_size, len(mins)))
+        self._filled = 0
+
+    def _paths(self, X):
+        """Node index at every depth of every tree for each row: shape (depth + 1, rows, trees)"""
+        rows = np.arange(len(X))[:, None]
+        nodes = np.zeros((len(X), self.n_trees), dtype=np.int64)
+        paths = np.empty((self.depth + 1, len(X), self.n_trees), dtype=np.int64)
+        paths[0] = nodes
+        for level in range(1, self.depth + 1):
+            features = self.split_features[self._trees, nodes]
+            right = X[rows, features] >= self.split_values[self._trees, nodes]
+            nodes = 2 * nodes + 1 + right
+            paths[level] = nodes
+        return paths
+
+    def _score_paths(self, paths):
+        mass = self.reference[self._trees, paths]
+        # Stop at the first node too sparse to split further, or at the leaf
+        sparse = mass <= self.size_limit
+        sparse[-1] = True
+        stop = sparse.argmax(axis=0)
+        stopped = np.take_along_axis(mass, stop[None], axis=0)[0]
+        return (stopped * 2.0 ** stop).sum(axis=1)
+
+    def fit(self, X):
+        """Build the trees over the ranges in `X` and use it as the reference window"""
+        X = np.asarray(X, dtype=float)
+        self.n_features = X.shape[1]
+        self._build(X.min(axis=0), X.max(axis=0))
+
+        paths = self._paths(X)
+        np.add.at(self.reference, (self._trees, paths), 1.0)
+        # Scaled to one window's mass, so scores are comparable with the windows that follow
+        self.reference *= self.window_size / len(X)
+        self.threshold = float(np.quantile(self._score_paths(paths), self.contamination))
+        self.seen = len(X)
+        self.windows = 1
+        return self
+
+    def learn(self, X):
+        """Add points to the current window, rolling the window over every `window_size` points"""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        while len(X):
+            take = min(len(X), self.window_size - self._filled)
+            chunk, X = X[:take], X[take:]
+            np.add.at(self.latest, (self._trees, self._paths(chunk)), 1.0)
+            self._window[self._filled:self._filled + take] = chunk
+            self._filled += take
+            self.seen += take
+            if self._filled == self.window_size:
+                self._roll()
+
+    def _roll(self):
+        self.reference, self.latest = self.latest, self.reference
+        self.latest[:] = 0
+        self.threshold = float(np.quantile(self.score(self._window), self.contamination))
+        self._filled = 0
+        self.windows += 1
+
+    def score(self, X):
+        """Mass scores, lower is more anomalous"""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        return self._score_paths(self._paths(X))
+
+    def predict(self, X):
+        """-1 for anomalies and 1 for normal points, like scikit-learn's outlier detectors"""
+        return np.where(self.score(X) < self.threshold, -1, 1)
+
+    def get_stats(self):
+        return {
+            'trees': self.n_trees,
+            'depth': self.depth,
+            'window_size': self.window_size,
+            'windows': self.windows,
+            'seen': self.seen,
+            'window_filled': self._filled if self.n_features else 0,
+            'threshold': self.threshold
+        }
@@ -1,29 +1,65 @@
-import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.neural_network import MLPClassifier
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-import networkx as nx
+import os
+import time
+import zlib
+from datetime import datetime
+
 import joblib
-import json
-from datetime import datetime, timedelta
+import numpy as np
+
+from graph import SlidingWindowGraph, transaction_time
+from halfspace import HalfSpaceTrees
+from rings import FraudRingIndex
+
+# A transaction joining a ring of at least this many users inherits the ring's fraud rate as a floor
+RING_MIN_USERS = 3
+
+# Detectors that can flag anomalies in the ensemble
+ANOMALY_DETECTORS = ['half_space_trees', 'isolation_forest']
 
 class FraudDetectionModel:
-    def __init__(self):
+    def __init__(self, graph_window_seconds=86400, graph_half_life_seconds=3600, graph_max_edges=200000,
+                 ring_max_shared_users=25, anomaly_detector='half_space_trees'):
+        if anomaly_detector not in ANOMALY_DETECTORS:
+            raise ValueError(f"Unknown anomaly detector {anomaly_detector!r}, expected one of {ANOMALY_DETECTORS}")
+        # Created by train() or load_model(); scikit-learn and TensorFlow take seconds
+        # to import, so they are only imported there and creating a model is instant
+        self.scaler = None
+        self.rf_model = None
+        self.isolation_forest = None
+        self.half_space_trees = None
+        self.anomaly_detector = anomaly_detector
+        self.mlp_model = None
+        self.lstm_model = None
+        self.graph_settings = {
+            'window_seconds': graph_window_seconds,
+            'half_life_seconds': graph_half_life_seconds,
+            'max_edges': graph_max_edges
+        }
+        self.graph_window = SlidingWindowGraph(**self.graph_settings)
+        self.ring_max_shared_users = ring_max_shared_users
+        self.rings = FraudRingIndex(ring_max_shared_users, graph_window_seconds)
+        self.is_trained = False
+    
+    @property
+    def graph(self):
+        return self.graph_window.graph
+        
+    def _new_estimators(self):
+        """Untrained scikit-learn models for train()"""
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.ensemble import RandomForestClassifier, IsolationForest
+        from sklearn.neural_network import MLPClassifier
+        
         self.scaler = StandardScaler()
-        self.label_encoder = LabelEncoder()
         self.rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.isolation_forest = IsolationForest(contamination=0.1, random_state=42)
         self.mlp_model = MLPClassifier(hidden_layer_sizes=(100, 50), max_iter=500, random_state=42)
-        self.lstm_model = None
-        self.graph = nx.Graph()
-        self.is_trained = False
-        
+    
     def create_lstm_model(self, input_shape):
         """Create LSTM model for sequence prediction"""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        
         model = Sequential([
             LSTM(50, return_sequences=True, input_shape=input_shape),
             Dropout(0.2),
@@ -36,6 +72,10 @@ class FraudDetectionModel:
         model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
         return model
     
+    def _bucket(self, value):
+        """Stable 0-999 code for a categorical value (built-in hash() differs per process)"""
+        return zlib.crc32(str(value).encode()) % 1000
+    
     def extract_features(self, transactions):
         """Extract features from transactions"""
         features = []
@@ -43,9 +83,9 @@ class FraudDetectionModel:
         for tx in transactions:
             feature_vector = [
                 tx.get('amount', 0),
-                hash(tx.get('merchant', '')) % 1000,
-                hash(tx.get('location', '')) % 1000,
-                hash(tx.get('device_info', '')) % 1000,
+                self._bucket(tx.get('merchant', '')),
+                self._bucket(tx.get('location', '')),
+                self._bucket(tx.get('device_info', '')),
                 self._get_hour_of_day(tx.get('timestamp', '')),
                 self._get_day_of_week(tx.get('timestamp', '')),
                 len(tx.get('ip_address', '')),
@@ -73,31 +113,46 @@ class FraudDetectionModel:
     
     def build_transaction_graph(self, transactions):
         """Build graph of transaction relationships"""
-        for tx in transactions:
-            user_id = tx.get('user_id', '')
-            merchant = tx.get('merchant', '')
-            location = tx.get('location', '')
-            
-            # Add nodes and edges
-            self.graph.add_node(user_id, type='user')
-            self.graph.add_node(merchant, type='merchant')
-            self.graph.add_node(location, type='location')
-            
-            # Add edges
-            self.graph.add_edge(user_id, merchant, weight=tx.get('amount', 0))
-            self.graph.add_edge(user_id, location, weight=1)
-            self.graph.add_edge(merchant, location, weight=1)
+        # Oldest first, so the window and decay see events in the order they happened
+        for tx in sorted(transactions, key=transaction_time):
+            self.graph_window.observe(tx)
+    
+    def build_ring_index(self, transactions):
+        """Link users through shared devices, IPs and cards, labelling known fraud"""
+        self.rings = FraudRingIndex(self.ring_max_shared_users, self.graph_settings['window_seconds'])
+        for tx in sorted(transactions, key=transaction_time):
+            self.rings.observe(tx, flagged=tx.get('risk_profile') == 'fraudulent',
+                               timestamp=min(transaction_time(tx), time.time()))
+    
+    def observe(self, transaction, flagged=False):
+        """Add a live transaction to the windowed graph, ring index and streaming anomaly detector after it has been scored"""
+        # Live traffic is windowed by receipt time; the client's timestamp can't be trusted to move the window
+        now = time.time()
+        self.graph_window.observe(transaction, timestamp=now)
+        self.rings.observe(transaction, flagged, timestamp=now)
+        # Blocked transactions aren't learned as normal, so a sustained attack stays anomalous
+        if self.half_space_trees is not None and not flagged:
+            self.half_space_trees.learn(self.extract_features([transaction]))
+    
+    def _centrality(self, node):
+        """Degree centrality of one node, without computing it for the whole graph"""
+        nodes = self.graph.number_of_nodes()
+        if node not in self.graph or nodes < 2:
+            return 0
+        return self.graph.degree(node) / (nodes - 1)
     
     def get_graph_features(self, transaction):
         """Extract graph-based features"""
         user_id = transaction.get('user_id', '')
         merchant = transaction.get('merchant', '')
+        # Decayed to the newest event in the window, so replayed history is scored as it was at the time
+        now = self.graph_window.latest or None
         
         features = {
-            'user_degree': self.graph.degree(user_id) if user_id in self.graph else 0,
-            'merchant_degree': self.graph.degree(merchant) if merchant in self.graph else 0,
-            'user_centrality': nx.degree_centrality(self.graph).get(user_id, 0),
-            'merchant_centrality': nx.degree_centrality(self.graph).get(merchant, 0),
+            'user_degree': self.graph_window.weighted_degree(user_id, now),
+            'merchant_degree': self.graph_window.weighted_degree(merchant, now),
+            'user_centrality': self._centrality(user_id),
+            'merchant_centrality': self._centrality(merchant),
         }
         
         return list(features.values())
@@ -122,24 +177,31 @@ class FraudDetectionModel:
             y = np.array(y)
             
             # Scale features
+            self._new_estimators()
             X_scaled = self.scaler.fit_transform(X)
             
             # Train models
             self.rf_model.fit(X_scaled, y)
             self.isolation_forest.fit(X_scaled)
+            # Works on raw features, so its live state stays valid when a retrain refits the scaler
+            self.half_space_trees = HalfSpaceTrees(random_state=42).fit(X)
             self.mlp_model.fit(X_scaled, y)
             
             # Train LSTM model
             if len(X_scaled) > 10:
                 # Reshape for LSTM (samples, time steps, features)
+                import tensorflow as tf
+                
                 X_lstm = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
                 y_categorical = tf.keras.utils.to_categorical(y, num_classes=3)
                 
                 self.lstm_model = self.create_lstm_model((1, X_scaled.shape[1]))
                 self.lstm_model.fit(X_lstm, y_categorical, epochs=10, batch_size=32, verbose=0)
             
-            # Build transaction graph
+            # Build transaction graph from this training set only, so retraining on overlapping windows doesn't double count
+            self.graph_window = SlidingWindowGraph(**self.graph_settings)
             self.build_transaction_graph(transactions)
+            self.build_ring_index(transactions)
             
             self.is_trained = True
             return True
@@ -154,59 +216,128 @@ class FraudDetectionModel:
             return {'error': 'Model not trained'}
         
         try:
-            # Extract features
-            X = self.extract_features([transaction])
-            X_scaled = self.scaler.transform(X)
-            
-            # Get predictions from all models
+            return self.predict_batch([transaction])[0]
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def predict_fast(self, transaction):
+        """Random forest score only, for requests shed under load: no MLP, LSTM, graph or ring work"""
+        if not self.is_trained:
+            return {'error': 'Model not trained'}
+
+        try:
+            X_scaled = self.scaler.transform(self.extract_features([transaction]))
             rf_pred = self.rf_model.predict_proba(X_scaled)[0]
-            isolation_pred = self.isolation_forest.predict(X_scaled)[0]
-            mlp_pred = self.mlp_model.predict_proba(X_scaled)[0]
-            
-            # LSTM prediction
-            lstm_pred = [0.33, 0.33, 0.34]  # default
-            if self.lstm_model:
-                X_lstm = X_scaled.reshape((1, 1, X_scaled.shape[1]))
-                lstm_pred = self.lstm_model.predict(X_lstm, verbose=0)[0]
-            
-            # Graph features
-            graph_features = self.get_graph_features(transaction)
-            graph_risk = sum(graph_features) / len(graph_features) if graph_features else 0.5
-            
-            # Ensemble prediction
-            ensemble_pred = (rf_pred + mlp_pred + lstm_pred) / 3
-            
-            # Adjust for isolation forest (anomaly detection)
-            if isolation_pred == -1:  # anomaly detected
-                ensemble_pred[2] = max(ensemble_pred[2], 0.7)  # boost fraudulent probability
-            
-            # Adjust for graph features
-            if graph_risk > 0.7:
-                ensemble_pred[2] = max(ensemble_pred[2], 0.6)
-            
-            # Normalize probabilities
-            ensemble_pred = ensemble_pred / np.sum(ensemble_pred)
-            
+            labels = ['normal', 'suspicious', 'fraudulent']
             return {
+                'risk_scores': {label: float(rf_pred[i]) for i, label in enumerate(labels)},
+                'prediction': labels[int(np.argmax(rf_pred))],
+                'confidence': float(np.max(rf_pred)),
+                'model_components': {'random_forest': rf_pred.tolist()}
+            }
+        except Exception as e:
+            return {'error': str(e)}
+
+    def predict_batch(self, transactions):
+        """Predict fraud risk for many transactions with one call into each model"""
+        return self.combine_predictions(transactions, self.model_outputs(transactions))
+    
+    def _uses_half_space_trees(self):
+        # The streaming detector needs a model trained since it was added
+        return self.anomaly_detector == 'half_space_trees' and self.half_space_trees is not None
+    
+    def model_outputs(self, transactions):
+        """Classifier inference only. It reads no state that observe() changes, so it needs no lock"""
+        if not self.is_trained:
+            raise ValueError('Model not trained')
+        
+        # Extract features
+        X = self.extract_features(transactions)
+        X_scaled = self.scaler.transform(X)
+        
+        # Get predictions from all models
+        rf_pred = self.rf_model.predict_proba(X_scaled)
+        mlp_pred = self.mlp_model.predict_proba(X_scaled)
+        
+        # LSTM prediction
+        lstm_pred = np.tile([0.33, 0.33, 0.34], (len(transactions), 1))  # default
+        if self.lstm_model:
+            X_lstm = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+            # Calling the model directly is safe from concurrent scoring threads, unlike Keras's predict()
+            lstm_pred = np.asarray(self.lstm_model(X_lstm, training=False))
+        
+        # The isolation forest is only refit by train(), unlike the streaming detector
+        isolation_pred = None if self._uses_half_space_trees() else self.isolation_forest.predict(X_scaled)
+        
+        return {'X': X, 'rf': rf_pred, 'mlp': mlp_pred, 'lstm': lstm_pred, 'isolation_forest': isolation_pred}
+    
+    def combine_predictions(self, transactions, outputs):
+        """Add anomaly, graph and ring signals to `model_outputs` and build the results.
+        
+        These read state that observe() updates, so callers sharing the model
+        across threads hold the same lock as for observe() while this runs.
+        """
+        X, rf_pred, mlp_pred, lstm_pred = outputs['X'], outputs['rf'], outputs['mlp'], outputs['lstm']
+        
+        # Graph and fraud-ring features
+        graph_risk = np.empty(len(transactions))
+        ring_risk = np.zeros(len(transactions))
+        rings = []
+        for i, tx in enumerate(transactions):
+            graph_features = self.get_graph_features(tx)
+            graph_risk[i] = sum(graph_features) / len(graph_features)
+            ring = self.rings.features(tx)
+            rings.append(ring)
+            if ring['cluster_users'] >= RING_MIN_USERS:
+                ring_risk[i] = ring['cluster_fraud_rate']
+        
+        # Ensemble prediction
+        ensemble_pred = (rf_pred + mlp_pred + lstm_pred) / 3
+        
+        # Adjust for the anomaly detector
+        if outputs['isolation_forest'] is None:
+            anomaly_name = 'half_space_trees'
+            anomaly_scores = self.half_space_trees.score(X)
+            anomalies = anomaly_scores < self.half_space_trees.threshold
+        else:
+            anomaly_name = 'isolation_forest'
+            anomaly_scores = outputs['isolation_forest']
+            anomalies = anomaly_scores == -1
+        ensemble_pred[anomalies, 2] = np.maximum(ensemble_pred[anomalies, 2], 0.7)  # boost fraudulent probability
+        
+        # Adjust for graph features
+        high_graph_risk = graph_risk > 0.7
+        ensemble_pred[high_graph_risk, 2] = np.maximum(ensemble_pred[high_graph_risk, 2], 0.6)
+        
+        # Adjust for membership of a ring that is mostly fraud
+        fraud_ring = ring_risk > 0.5
+        ensemble_pred[fraud_ring, 2] = np.maximum(ensemble_pred[fraud_ring, 2], ring_risk[fraud_ring])
+        
+        # Normalize probabilities
+        ensemble_pred = ensemble_pred / ensemble_pred.sum(axis=1, keepdims=True)
+        
+        labels = ['normal', 'suspicious', 'fraudulent']
+        return [
+            {
                 'risk_scores': {
-                    'normal': float(ensemble_pred[0]),
-                    'suspicious': float(ensemble_pred[1]),
-                    'fraudulent': float(ensemble_pred[2])
+                    'normal': float(ensemble_pred[i, 0]),
+                    'suspicious': float(ensemble_pred[i, 1]),
+                    'fraudulent': float(ensemble_pred[i, 2])
                 },
-                'prediction': ['normal', 'suspicious', 'fraudulent'][np.argmax(ensemble_pred)],
-                'confidence': float(np.max(ensemble_pred)),
-                'anomaly_detected': isolation_pred == -1,
-                'graph_risk': graph_risk,
+                'prediction': labels[int(np.argmax(ensemble_pred[i]))],
+                'confidence': float(np.max(ensemble_pred[i])),
+                'anomaly_detected': bool(anomalies[i]),
+                'graph_risk': float(graph_risk[i]),
+                'ring': rings[i],
                 'model_components': {
-                    'random_forest': rf_pred.tolist(),
-                    'mlp': mlp_pred.tolist(),
-                    'lstm': lstm_pred.tolist(),
-                    'isolation_forest': isolation_pred
+                    'random_forest': rf_pred[i].tolist(),
+                    'mlp': mlp_pred[i].tolist(),
+                    'lstm': np.asarray(lstm_pred[i]).tolist(),
+                    anomaly_name: anomaly_scores[i].item()
                 }
             }
-            
-        except Exception as e:
-            return {'error': str(e)}
+            for i in range(len(transactions))
+        ]
     
     def save_model(self, filepath):
         """Save trained model"""
@@ -215,8 +346,10 @@ class FraudDetectionModel:
                 'scaler': self.scaler,
                 'rf_model': self.rf_model,
                 'isolation_forest': self.isolation_forest,
+                'half_space_trees': self.half_space_trees,
                 'mlp_model': self.mlp_model,
-                'graph': self.graph,
+                'graph_window': self.graph_window,
+                'rings': self.rings,
                 'is_trained': self.is_trained
             }, filepath)
             
@@ -228,6 +361,30 @@ class FraudDetectionModel:
             print(f"Error saving model: {e}")
             return False
     
+    def anomaly_snapshot_path(self, filepath):
+        return filepath.replace('.pkl', '_hst.pkl')
+    
+    def save_anomaly_snapshot(self, filepath):
+        """Save only the streaming anomaly detector, which changes with every observed transaction"""
+        if self.half_space_trees is None:
+            return False
+        try:
+            # Written aside and renamed, so a process starting up never loads half a file
+            snapshot_path = self.anomaly_snapshot_path(filepath)
+            joblib.dump(self.half_space_trees, snapshot_path + '.tmp')
+            os.replace(snapshot_path + '.tmp', snapshot_path)
+            return True
+        except Exception as e:
+            print(f"Error saving anomaly detector snapshot: {e}")
+            return False
+    
+    def get_anomaly_stats(self):
+        active = self.anomaly_detector if self.half_space_trees is not None else 'isolation_forest'
+        return {
+            'detector': active,
+            'half_space_trees': self.half_space_trees.get_stats() if self.half_space_trees is not None else None
+        }
+    
     def load_model(self, filepath):
         """Load trained model"""
         try:
@@ -235,15 +392,37 @@ class FraudDetectionModel:
             self.scaler = data['scaler']
             self.rf_model = data['rf_model']
             self.isolation_forest = data['isolation_forest']
+            self.half_space_trees = data.get('half_space_trees')
+            # A serving process's snapshot has kept learning since the trainer fit its copy
+            snapshot_path = self.anomaly_snapshot_path(filepath)
+            if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) > os.path.getmtime(filepath):
+                self.half_space_trees = joblib.load(snapshot_path)
             self.mlp_model = data['mlp_model']
-            self.graph = data['graph']
+            if 'graph_window' in data:
+                # The serving process's window settings win over the trainer's
+                self.graph_window = data['graph_window']
+                for setting, value in self.graph_settings.items():
+                    setattr(self.graph_window, setting, value)
+                # Files saved before timestamps were clamped may carry a window end in the future
+                self.graph_window.latest = min(self.graph_window.latest, time.time())
+            else:
+                # Model files from before the windowed graph hold a plain networkx graph
+                self.graph_window = SlidingWindowGraph.from_graph(data['graph'], **self.graph_settings)
+            if 'rings' in data:
+                self.rings = data['rings']
+                self.rings.max_shared_users = self.ring_max_shared_users
+                self.rings.window_seconds = self.graph_settings['window_seconds']
             self.is_trained = data['is_trained']
             
-            # Load LSTM model if exists
-            try:
-                self.lstm_model = tf.keras.models.load_model(filepath.replace('.pkl', '_lstm.h5'))
-            except:
-                self.lstm_model = None
+            # Load LSTM model if exists; TensorFlow is only imported when there is one
+            lstm_path = filepath.replace('.pkl', '_lstm.h5')
+            self.lstm_model = None
+            if os.path.exists(lstm_path):
+                try:
+                    import tensorflow as tf
+                    self.lstm_model = tf.keras.models.load_model(lstm_path)
+                except Exception as e:
+                    print(f"Error loading LSTM model: {e}")
             
             return True
         except Exception as e:
@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Functions in every source file under this directory are reported in the per-function totals; matched
+# by absolute path so same-named files in libraries (Keras's models/model.py) are never counted as ours
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Prefix of the frame labels for files under SERVICE_DIR
+PROFILED_PREFIX = os.path.basename(SERVICE_DIR) + '/'
+
+
+class SamplingProfiler:
+    """Low-overhead sampling profiler for a live worker.
+
+    A background thread snapshots the Python stacks of every other thread at a
+    fixed interval and folds them into collapsed-stack lines, so nothing is
+    instrumented and the scoring path pays no per-call cost.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = False
+        self.stacks = Counter()
+        self.samples = 0
+        self.requests_seen = 0
+        self.max_requests = None
+        self.started_at = None
+        self.stopped_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    def start(self, seconds=None, max_requests=None, max_seconds=60):
+        """Start sampling until `seconds` elapse or `max_requests` are scored"""
+        with self.lock:
+            if self.active:
+                return False
+
+            self.active = True
+            self.stacks = Counter()
+            self.samples = 0
+            self.requests_seen = 0
+            self.max_requests = max_requests
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop_event.clear()
+
+        duration = min(seconds or max_seconds, max_seconds)
+        self._thread = threading.Thread(
+            target=self._run, args=(self.started_at + duration,), daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+
+    def record_request(self):
+        """Count a scored request; stops sampling once the request budget is spent"""
+        if not self.active:
+            return
+
+        with self.lock:
+            self.requests_seen += 1
+            if self.max_requests and self.requests_seen >= self.max_requests:
+                self._stop_event.set()
+
+    def _run(self, deadline):
+        """Sampling loop"""
+        own_ident = threading.get_ident()
+
+        while not self._stop_event.is_set() and time.time() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{self._label(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+
+                # Idle threads only show up as waits; keep the output about real work
+                if stack and not self._is_idle(stack[0]):
+                    self.stacks[';'.join(reversed(stack))] += 1
+
+            self.samples += 1
+            self._stop_event.wait(self.interval)
+
+        with self.lock:
+            self.active = False
+            self.stopped_at = time.time()
+
+    def _label(self, filename):
+        """Frame file label: `risk_engine/model.py` for files under SERVICE_DIR, the bare file name otherwise"""
+        label = self._labels.get(filename)
+        if label is None:
+            path = os.path.abspath(filename)
+            # A virtualenv created inside the service directory is still library code
+            if path.startswith(SERVICE_DIR + os.sep) and 'site-packages' not in path:
+                label = PROFILED_PREFIX + os.path.relpath(path, SERVICE_DIR)
+            else:
+                label = os.path.basename(filename)
+            self._labels[filename] = label
+        return label
+
+    def _is_idle(self, leaf):
+        """Whether the innermost frame is a thread parked on a wait"""
+        return leaf.split(':', 1)[1] in ('wait', 'select', '_wait_for_tstate_lock', '_worker')
+
+    def wait(self, timeout=None):
+        """Block until the current run has finished"""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def collapsed(self):
+        """Collapsed-stack output, one `frame;frame;frame count` line per stack"""
+        return '\n'.join(
+            f"{stack} {count}" for stack, count in self.stacks.most_common()
+        )
+
+    def function_totals(self):
+        """Self and inclusive sample counts for the functions in the risk engine's own source files"""
+        totals = {}
+
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            seen = set()
+            for depth, frame in enumerate(frames):
+                if not frame.startswith(PROFILED_PREFIX):
+                    continue
+
+                entry = totals.setdefault(frame, {'self': 0, 'total': 0})
+                if frame not in seen:
+                    entry['total'] += count
+                    seen.add(frame)
+                if depth == len(frames) - 1:
+                    entry['self'] += count
+
+        return dict(sorted(totals.items(), key=lambda item: item[1]['total'], reverse=True))
+
+    def report(self):
+        """Profiling results for the last run"""
+        end = self.stopped_at or time.time()
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'duration_s': round(end - self.started_at, 3) if self.started_at else 0,
+            'requests_profiled': self.requests_seen,
+            'functions': self.function_totals(),
+            'collapsed': self.collapsed()
+        }
@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.blocklist import is_masked_card
+
+# Identifiers that link users into the same ring, and the transaction field each comes from
+LINK_FIELDS = {
+    'device': 'device_info',
+    'ip': 'ip_address',
+    'card': 'card_number'
+}
+
+MEMBER_KINDS = ['user'] + list(LINK_FIELDS)
+
+
+class RingGeneration:
+    """Incremental union-find over users and the devices, IPs and cards they use.
+
+    Every user and identifier is a node; a transaction unions its user with
+    each identifier on it, so users sharing any identifier, directly or
+    through other users, end up in one cluster. `find` uses path halving
+    and `union` merges the smaller cluster's member lists into the larger,
+    so an update costs near-constant amortised time. Per-cluster user,
+    transaction and flagged counts are kept on the root, and members are
+    kept per kind so a lookup only reads as many as it returns.
+    """
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.parent = {}
+        self.members = {}
+        self.counts = {}
+        self.identifier_users = {}
+
+    def _add(self, node):
+        kind = node.split(':', 1)[0]
+        self.parent[node] = node
+        self.members[node] = {kind: [node]}
+        # users, transactions, flagged transactions, members
+        self.counts[node] = [1 if kind == 'user' else 0, 0, 0, 1]
+
+    def find(self, node):
+        """Root of a node's cluster, adding the node if it is new"""
+        parent = self.parent
+        if node not in parent:
+            self._add(node)
+            return node
+
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+
+        if self.counts[root_a][3] < self.counts[root_b][3]:
+            root_a, root_b = root_b, root_a
+
+        self.parent[root_b] = root_a
+        members = self.members[root_a]
+        for kind, nodes in self.members.pop(root_b).items():
+            members.setdefault(kind, []).extend(nodes)
+        for i, count in enumerate(self.counts.pop(root_b)):
+            self.counts[root_a][i] += count
+        return root_a
+
+    def observe(self, user, identifiers, flagged, max_shared_users):
+        self.find(user)
+        for identifier in identifiers:
+            users = self.identifier_users.setdefault(identifier, set())
+            if user in users:
+                continue
+            if len(users) >= max_shared_users:
+                continue
+            users.add(user)
+            self.union(user, identifier)
+
+        counts = self.counts[self.find(user)]
+        counts[1] += 1
+        counts[2] += 1 if flagged else 0
+
+    @classmethod
+    def from_state(cls, state):
+        """Adopt an index pickled before ring windows, whose members were one list per cluster"""
+        generation = cls(time.time())
+        generation.parent = state['parent']
+        generation.identifier_users = state['identifier_users']
+        for root, nodes in state['members'].items():
+            generation.members[root] = {}
+            for node in nodes:
+                generation.members[root].setdefault(node.split(':', 1)[0], []).append(node)
+            generation.counts[root] = state['counts'][root] + [len(nodes)]
+        return generation
+
+
+class FraudRingIndex:
+    """Fraud-ring clusters over a sliding window of transactions.
+
+    A union-find can't forget, so the index keeps generations instead: a
+    new `RingGeneration` starts every `window_seconds` and each transaction
+    is added to every live generation, of which there are at most two.
+    Queries are answered from the older one, which covers between one and
+    two windows of history; when a newer generation has covered a whole
+    window the older one is dropped, together with every user and
+    identifier not seen since. Memory stays bounded by two windows of
+    traffic, and no rebuild ever stalls scoring.
+
+    An identifier seen with more than `max_shared_users` users (a device
+    model string, a carrier NAT address) is treated as a hub and stops
+    linking new users, otherwise it would merge everyone into one cluster.
+    """
+
+    def __init__(self, max_shared_users=25, window_seconds=86400):
+        self.max_shared_users = max_shared_users
+        self.window_seconds = window_seconds
+        self.generations = []
+        self.latest = 0.0
+
+    def __setstate__(self, state):
+        if 'parent' in state:
+            # Pickled before ring windows: the whole index becomes the first generation
+            self.__init__(state['max_shared_users'])
+            self.generations = [RingGeneration.from_state(state)]
+            self.latest = time.time()
+        else:
+            self.__dict__.update(state)
+
+    def _node(self, kind, value):
+        return f"{kind}:{value}"
+
+    def _links(self, transaction):
+        for kind, field in LINK_FIELDS.items():
+            value = transaction.get(field)
+            # A masked card only carries its last digits, which unrelated users share
+            if value and not (kind == 'card' and is_masked_card(value)):
+                yield self._node(kind, value)
+
+    def _rotate(self, now):
+        self.latest = max(self.latest, now)
+        if not self.generations or self.latest - self.generations[-1].started_at >= self.window_seconds:
+            self.generations.append(RingGeneration(self.latest))
+        # Once the newer generation covers a whole window the older one is no longer needed
+        if len(self.generations) > 2:
+            self.generations = self.generations[-2:]
+
+    @property
+    def current(self):
+        """The generation queries are answered from"""
+        return self.generations[0] if self.generations else None
+
+    def observe(self, transaction, flagged=False, timestamp=None):
+        """Link a transaction's user to its identifiers and count it on the cluster"""
+        user_id = transaction.get('user_id')
+        if not user_id:
+            return
+
+        self._rotate(timestamp if timestamp is not None else time.time())
+        user = self._node('user', user_id)
+        identifiers = list(self._links(transaction))
+        for generation in self.generations:
+            generation.observe(user, identifiers, flagged, self.max_shared_users)
+
+    def features(self, transaction):
+        """Cluster size and fraud rate the transaction would join, without modifying the index"""
+        generation = self.current
+        if generation is None:
+            return {'cluster_users': 0, 'cluster_transactions': 0, 'cluster_fraud_rate': 0.0}
+
+        nodes = [self._node('user', transaction.get('user_id'))] + [
+            identifier for identifier in self._links(transaction)
+            if len(generation.identifier_users.get(identifier, ())) < self.max_shared_users
+        ]
+        roots = {generation.find(node) for node in nodes if node in generation.parent}
+
+        users = sum(generation.counts[root][0] for root in roots)
+        transactions = sum(generation.counts[root][1] for root in roots)
+        flagged = sum(generation.counts[root][2] for root in roots)
+        return {
+            'cluster_users': users,
+            'cluster_transactions': transactions,
+            'cluster_fraud_rate': flagged / transactions if transactions else 0.0
+        }
+
+    def lookup(self, user_id, limit=100):
+        """Cluster of a user: counts plus up to `limit` of its users and of each kind of shared identifier"""
+        generation = self.current
+        user = self._node('user', user_id)
+        if generation is None or user not in generation.parent:
+            return None
+
+        root = generation.find(user)
+        users, transactions, flagged, _ = generation.counts[root]
+        members = {
+            kind: [node.split(':', 1)[1] for node in generation.members[root].get(kind, [])[:limit]]
+            for kind in MEMBER_KINDS
+        }
+
+        return {
+            'cluster_id': root,
+            'users': users,
+            'transactions': transactions,
+            'flagged_transactions': flagged,
+            'fraud_rate': flagged / transactions if transactions else 0.0,
+            'members': {
+                'users': members['user'],
+                'devices': members['device'],
+                'ips': members['ip'],
+                'cards': members['card']
+            }
+        }
+
+    def get_stats(self):
+        generation = self.current
+        if generation is None:
+            nodes, clusters, largest, hubs = 0, 0, 0, 0
+        else:
+            nodes, clusters = len(generation.parent), len(generation.members)
+            largest = max((counts[0] for counts in generation.counts.values()), default=0)
+            hubs = sum(1 for users in generation.identifier_users.values() if len(users) >= self.max_shared_users)
+        return {
+            'nodes': nodes,
+            'clusters': clusters,
+            'largest_cluster_users': largest,
+            'hub_identifiers': hubs,
+            'max_shared_users': self.max_shared_users,
+            'window_seconds': self.window_seconds,
+            'generations': len(self.generations),
+            'covers_seconds': round(self.latest - generation.started_at, 1) if generation else 0.0
+        }
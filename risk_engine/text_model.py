@@ -0,0 +1,125 @@
+import math
+import re
+import zlib
+
+import joblib
+import numpy as np
+from scipy.sparse import csr_matrix
+
+LABELS = ['normal', 'suspicious', 'fraudulent']
+TOKEN_PATTERN = re.compile(r"\w\w+")
+
+
+class DistilledTextRiskModel:
+    """Hashed n-gram softmax regression distilled from the LLM service.
+
+    Trained on the DistilBERT service's soft outputs for the same transaction
+    text, and served in process as the LLM component when the remote call
+    misses its latency budget.
+    """
+
+    def __init__(self, n_features=2 ** 18):
+        self.n_features = n_features
+        self.weights = None
+        self.bias = None
+        self.is_trained = False
+
+    def preprocess_transaction(self, transaction):
+        """Same text the LLM service scores, plus an amount-magnitude token"""
+        amount = transaction.get('amount', 0) or 0
+        text = f"Transaction: ${amount} at {transaction.get('merchant', '')} " \
+               f"in {transaction.get('location', '')} using {transaction.get('device_info', '')} " \
+               f"from IP {transaction.get('ip_address', '')}"
+        # Negative amounts (refunds, bad input) share the zero bucket instead of failing the log
+        return f"{text} amountmag{int(math.log2(max(float(amount), 0) + 1))}"
+
+    def _features(self, transaction):
+        """Hashed, l2-normalized unigram and bigram indices for one transaction"""
+        tokens = TOKEN_PATTERN.findall(self.preprocess_transaction(transaction).lower())
+        ngrams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+        counts = {}
+        for ngram in ngrams:
+            index = zlib.crc32(ngram.encode()) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return indices, values / np.sqrt((values ** 2).sum())
+
+    def _matrix(self, transactions):
+        """Sparse feature matrix for a list of transactions"""
+        indptr, indices, values = [0], [], []
+        for tx in transactions:
+            tx_indices, tx_values = self._features(tx)
+            indices.append(tx_indices)
+            values.append(tx_values)
+            indptr.append(indptr[-1] + len(tx_indices))
+
+        return csr_matrix(
+            (np.concatenate(values), np.concatenate(indices), indptr),
+            shape=(len(transactions), self.n_features)
+        )
+
+    def _softmax(self, logits):
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def fit(self, transactions, teacher_scores, epochs=20, learning_rate=2.0, batch_size=256, seed=42):
+        """Minibatch gradient descent on cross-entropy against the teacher's soft labels"""
+        X = self._matrix(transactions)
+        targets = np.array([[scores[label] for label in LABELS] for scores in teacher_scores])
+        rng = np.random.default_rng(seed)
+
+        self.weights = np.zeros((X.shape[1], len(LABELS)), dtype=np.float32)
+        self.bias = np.log(targets.mean(axis=0) + 1e-9).astype(np.float32)
+
+        for _ in range(epochs):
+            order = rng.permutation(X.shape[0])
+            for start in range(0, len(order), batch_size):
+                rows = order[start:start + batch_size]
+                X_batch = X[rows]
+                error = self._softmax(X_batch @ self.weights + self.bias) - targets[rows]
+                self.weights -= learning_rate * np.asarray(X_batch.T @ error, dtype=np.float32) / len(rows)
+                self.bias -= learning_rate * error.mean(axis=0).astype(np.float32)
+
+        self.is_trained = True
+
+    def predict_proba(self, transactions):
+        """Class probabilities for a list of transactions"""
+        return self._softmax(self._matrix(transactions) @ self.weights + self.bias)
+
+    def predict(self, transaction):
+        """Risk scores for one transaction, shaped like the LLM service's output"""
+        indices, values = self._features(transaction)
+        logits = values @ self.weights[indices] + self.bias
+        probabilities = self._softmax(logits[np.newaxis, :])[0]
+        return {label: float(p) for label, p in zip(LABELS, probabilities)}
+
+    def save_model(self, filepath):
+        """Save trained model"""
+        try:
+            joblib.dump({
+                'n_features': self.n_features,
+                'weights': self.weights,
+                'bias': self.bias,
+                'is_trained': self.is_trained
+            }, filepath)
+            return True
+        except Exception as e:
+            print(f"Error saving text model: {e}")
+            return False
+
+    def load_model(self, filepath):
+        """Load trained model"""
+        try:
+            data = joblib.load(filepath)
+            self.__init__(n_features=data['n_features'])
+            self.weights = data['weights']
+            self.bias = data['bias']
+            self.is_trained = data['is_trained']
+            return True
+        except Exception as e:
+            print(f"Error loading text model: {e}")
+            return False